@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+from bench.synthetic_pdf import VOCABULARY
+
+# Offline stand-in for the google-genai client. It is installed under the real
+# API-key slots of core.gemini_client, so every call still goes through the
+# call plan, rate limiter, LLM cache, retries and metrics exactly as in production.
+
+
+class FakeGeminiError(Exception):
+    pass
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _CachedContent:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class _Embedding:
+    def __init__(self, values):
+        self.values = values
+
+
+class FakeGemini:
+    """
+    latency: mean seconds per call (exponentially distributed around it, like a real API)
+    rate_429: fraction of calls that fail with a 429 (quota) error
+    stream_pieces: chunks a streamed answer is split into
+    """
+
+    def __init__(self, latency: float = 0.5, rate_429: float = 0.0, seed: int = 0, stream_pieces: int = 8):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.stream_pieces = stream_pieces
+        self._rng = random.Random(seed)
+        self.calls = 0
+        self.injected_429 = 0
+        self.busy_seconds = 0.0
+        self.prompt_chars = 0
+        self.cached_contents = {}
+        self.aio = type("AsyncSurface", (), {"models": self, "caches": _AsyncCaches(self)})()
+        self.models = _SyncModels(self)
+
+    # --- behaviour ---
+    def _delay(self) -> float:
+        return self._rng.expovariate(1 / self.latency) if self.latency > 0 else 0.0
+
+    def _maybe_fail(self, model: str):
+        self.calls += 1
+        if self._rng.random() < self.rate_429:
+            self.injected_429 += 1
+            raise FakeGeminiError(f"429 RESOURCE_EXHAUSTED: quota exceeded for {model} (injected)")
+
+    def answer(self, prompt: str, config=None) -> str:
+        self.prompt_chars += len(prompt)
+        cached = getattr(config, "cached_content", None)
+        if cached:
+            if cached not in self.cached_contents:
+                raise FakeGeminiError(f"404 NOT_FOUND: cached content {cached} (fake)")
+            prompt = self.cached_contents[cached] + "\n" + prompt
+        schema = getattr(config, "response_schema", None)
+        if hasattr(schema, "model_dump"):
+            # GenerateContentConfig turns the schema dict into a types.Schema model
+            schema = schema.model_dump(exclude_none=True)
+        if schema is not None:
+            seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+            return json.dumps(fake_from_schema(schema, random.Random(seed)))
+        words = [w for w in VOCABULARY if w in prompt.lower()][:6] or VOCABULARY[:6]
+        return (
+            f"- The document covers {', '.join(words[:3])}.\n"
+            f"- Key ideas: {', '.join(words[3:]) or words[0]}.\n"
+            "- This is a synthetic answer from the offline benchmark model."
+        )
+
+    # --- google-genai surface used by core.gemini_client (client.aio.models.*) ---
+    async def generate_content(self, model: str, contents: str, config=None):
+        delay = self._delay()
+        await asyncio.sleep(delay)
+        self.busy_seconds += delay
+        self._maybe_fail(model)
+        return _Response(self.answer(contents, config))
+
+    async def generate_content_stream(self, model: str, contents: str, config=None):
+        self._maybe_fail(model)
+        text = self.answer(contents, config)
+        step = max(1, len(text) // self.stream_pieces)
+        delay = self._delay() / self.stream_pieces
+
+        async def pieces():
+            for start in range(0, len(text), step):
+                await asyncio.sleep(delay)
+                self.busy_seconds += delay
+                yield _Response(text[start:start + step])
+
+        return pieces()
+
+    async def embed_content(self, model: str, contents: list):
+        await asyncio.sleep(self._delay() / 4)
+        result = type("EmbedResult", (), {})()
+        result.embeddings = [_Embedding(_hash_vector(text)) for text in contents]
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "injected429": self.injected_429,
+            "simulatedSeconds": round(self.busy_seconds, 3),
+            "promptChars": self.prompt_chars,
+            "cachedContents": len(self.cached_contents),
+        }
+
+
+class _AsyncCaches:
+    """client.aio.caches.* (explicit context caching) used by core/context_cache.py."""
+
+    def __init__(self, fake: FakeGemini):
+        self.fake = fake
+
+    async def create(self, model: str, config=None):
+        await asyncio.sleep(self.fake._delay())
+        parts = [getattr(config, "system_instruction", "") or ""]
+        for content in getattr(config, "contents", None) or []:
+            # The SDK normalizes plain strings into Content(parts=[Part(text=...)])
+            parts.extend(getattr(p, "text", "") or "" for p in getattr(content, "parts", None) or [content])
+        name = f"cachedContents/fake-{len(self.fake.cached_contents)}"
+        self.fake.cached_contents[name] = "\n".join(str(p) for p in parts)
+        return _CachedContent(name)
+
+
+class _SyncModels:
+    """client.models.* for the blocking call_gemini()."""
+
+    def __init__(self, fake: FakeGemini):
+        self.fake = fake
+
+    def generate_content(self, model: str, contents: str, config=None):
+        delay = self.fake._delay()
+        time.sleep(delay)
+        self.fake.busy_seconds += delay
+        self.fake._maybe_fail(model)
+        return _Response(self.fake.answer(contents, config))
+
+
+def _hash_vector(text: str, dims: int = 64) -> list:
+    digest = hashlib.sha256(text.encode("utf-8")).digest() * (dims // 32)
+    return [b / 255 for b in digest[:dims]]
+
+
+def fake_from_schema(schema: dict, rng: random.Random, path: str = ""):
+    """Plausible JSON for a response schema (OBJECT / ARRAY / STRING / INTEGER / NUMBER / BOOLEAN)."""
+    kind = schema.get("type", "STRING")
+    kind = str(getattr(kind, "value", kind)).upper()
+    if kind == "OBJECT":
+        return {
+            name: fake_from_schema(sub, rng, name)
+            for name, sub in schema.get("properties", {}).items()
+        }
+    if kind == "ARRAY":
+        count = 4 if path == "options" else rng.randint(5, 8)
+        return [fake_from_schema(schema.get("items", {}), rng, path) for _ in range(count)]
+    if kind == "INTEGER":
+        return rng.randint(0, 3)
+    if kind == "NUMBER":
+        return round(rng.random(), 3)
+    if kind == "BOOLEAN":
+        return rng.random() < 0.5
+    words = rng.sample(VOCABULARY, 4)
+    if path in ("question", "front"):
+        return f"What is the role of {words[0]} in {words[1]} and {words[2]}?"
+    return f"{path or 'text'}: {' '.join(words)} explained for the benchmark."
+
+
+def install(fake: FakeGemini, rpm: float = None):
+    """Route every configured API key to `fake` (and optionally lift the per-model RPM limits)."""
+    import core.gemini_client as gemini_client
+    from core.rate_limiter import RateLimiter
+
+    for key in gemini_client.AVAILABLE_KEYS:
+        gemini_client._CLIENTS[key] = fake
+    if rpm is not None:
+        gemini_client.rate_limiter = RateLimiter({}, rpm)
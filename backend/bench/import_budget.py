@@ -0,0 +1,110 @@
+"""
+Cold-start import budget for the backend services.
+
+Imports each service module in a fresh interpreter with `python -X importtime`
+and fails (exit code 1) when the import takes longer than its budget, or when
+a heavy dependency that should load lazily (on first use or in the start-up
+warm-up, see core/warmup.py) is imported at module load again.
+
+Checked by the test suite (tests/test_import_budget.py); to see the numbers,
+run from backend/:
+    python -m bench.import_budget
+    python -m bench.import_budget --budget-ms 1500 --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default budget per module in milliseconds (cumulative import time of the module itself)
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", 1000))
+
+# Must not be imported just by loading a service
+HEAVY_MODULES = [
+    "google.genai",
+    "textblob",
+    "textstat",
+    "nltk",
+    "pypdf",
+    "pdfplumber",
+    "keybert",
+    "sentence_transformers",
+    "httpx",
+    "requests",
+    "edge_tts",
+    "mutagen",
+]
+
+SERVICES = {
+    "main": "main",
+    "asset-service": "members.member3.service",
+}
+
+
+def measure(module: str) -> dict:
+    """Import `module` in a fresh interpreter; returns its import time and every module loaded."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total_us, loaded = 0, set()
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        loaded.add(name)
+        if name == module:
+            total_us = int(cumulative)
+    return {"milliseconds": round(total_us / 1000, 1), "modules": loaded}
+
+
+def check(budget_ms: float) -> list:
+    reports = []
+    for service, module in SERVICES.items():
+        measured = measure(module)
+        heavy = sorted(
+            name for name in HEAVY_MODULES
+            if any(m == name or m.startswith(name + ".") for m in measured["modules"])
+        )
+        reports.append({
+            "service": service,
+            "module": module,
+            "milliseconds": measured["milliseconds"],
+            "budgetMs": budget_ms,
+            "heavyImports": heavy,
+            "ok": measured["milliseconds"] <= budget_ms and not heavy,
+        })
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when service cold-start imports regress")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="import budget per service")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    reports = check(args.budget_ms)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            verdict = "OK  " if report["ok"] else "FAIL"
+            line = f"{verdict} {report['service']:<14} {report['milliseconds']:>8.1f} ms (budget {report['budgetMs']:.0f} ms)"
+            if report["heavyImports"]:
+                line += f"  eager heavy imports: {', '.join(report['heavyImports'])}"
+            print(line)
+    sys.exit(0 if all(r["ok"] for r in reports) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Offline load benchmark for the backend API.
+
+Simulates N students who each upload a synthetic PDF, ask a few chat
+questions, then generate a quiz and flashcards. Gemini is replaced by
+bench/fake_gemini.py (configurable latency and 429 injection) and requests
+go straight to the ASGI app, so no network or API key is needed.
+
+Run from backend/:
+    python -m bench.run --students 20 --pages 30 --latency 0.5 --rate-429 0.05 --output bench.json
+
+Prints (or writes) JSON with throughput and p50/p95/p99 latency per endpoint,
+ready to diff against a baseline run.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUESTIONS = [
+    "What is the main hypothesis discussed in this document?",
+    "Explain how variance relates to the sample mean.",
+    "Summarize the section about gradient and regression.",
+    "eli5 what a confidence interval is",
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline backend benchmark")
+    parser.add_argument("--students", type=int, default=10, help="concurrent simulated students")
+    parser.add_argument("--pages", type=int, default=20, help="pages per synthetic PDF")
+    parser.add_argument("--chats", type=int, default=3, help="chat questions per student")
+    parser.add_argument("--latency", type=float, default=0.3, help="mean fake Gemini latency in seconds")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of Gemini calls failing with 429")
+    parser.add_argument("--rpm", type=float, default=6000, help="per (key, model) RPM budget for the rate limiter")
+    parser.add_argument("--same-pdf", action="store_true", help="every student uploads the same PDF (exercises the upload cache)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="write the JSON report here instead of stdout")
+    parser.add_argument("--quiet", action="store_true", help="discard the backend's own log output")
+    return parser.parse_args(argv)
+
+
+def isolate_environment(workdir: str):
+    """Fresh caches/storage for every run, and placeholder keys so the client layer is active."""
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key-primary")
+    os.environ.setdefault("ALT_KEY", "bench-key-alternate")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.sqlite3")
+    os.environ["UPLOAD_CACHE_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["PDF_STORAGE_DIR"] = os.path.join(workdir, "storage")
+    os.environ["DOCUMENT_STORE_PATH"] = os.path.join(workdir, "documents.sqlite3")
+    os.environ["JOB_STORE_PATH"] = os.path.join(workdir, "jobs.sqlite3")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(samples),
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(p50), 4),
+        "p95": round(float(p95), 4),
+        "p99": round(float(p99), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    async def call(self, client, endpoint: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.post(endpoint, **kwargs)
+            ok = response.status_code == 200
+        except Exception as e:
+            print(f"[bench] {endpoint} raised {e}", file=sys.stderr)
+            response, ok = None, False
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return response if ok else None
+
+
+async def simulate_student(client, recorder: Recorder, student: int, pdf_bytes: bytes, chats: int):
+    response = await recorder.call(
+        client, "/upload",
+        files={"file": (f"student_{student}.pdf", pdf_bytes, "application/pdf")},
+    )
+    if response is None:
+        return
+    session_id = response.json()["sessionId"]
+    for i in range(chats):
+        question = QUESTIONS[(student + i) % len(QUESTIONS)]
+        await recorder.call(client, "/chat", json={"question": question, "sessionId": session_id})
+    await recorder.call(client, "/generate-quiz", json={"sessionId": session_id})
+    await recorder.call(client, "/generate-flashcards", json={"sessionId": session_id})
+
+
+async def run(args) -> dict:
+    import httpx
+    from bench.fake_gemini import FakeGemini, install
+    from bench.synthetic_pdf import make_pdf
+    import main
+
+    fake = FakeGemini(latency=args.latency, rate_429=args.rate_429, seed=args.seed)
+    install(fake, rpm=args.rpm)
+
+    pdfs = [make_pdf(args.pages, seed=args.seed if args.same_pdf else args.seed + i) for i in range(args.students)]
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=main.app)
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_student(client, recorder, i, pdfs[i], args.chats) for i in range(args.students)
+        ))
+        wall = time.perf_counter() - started
+
+    total = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "quiet")},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "wallSeconds": round(wall, 3),
+        "requests": total,
+        "errors": sum(recorder.errors.values()),
+        "throughputRps": round(total / wall, 3) if wall else 0.0,
+        "studentsPerMinute": round(args.students / wall * 60, 3) if wall else 0.0,
+        "endpoints": {
+            endpoint: {**percentiles(samples), "errors": recorder.errors.get(endpoint, 0)}
+            for endpoint, samples in recorder.latencies.items()
+        },
+        "gemini": fake.stats(),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The backend logs with print(); keep stdout for the JSON report only
+    log = open(os.devnull, "w") if args.quiet else sys.stderr
+    with tempfile.TemporaryDirectory(prefix="studyflow-bench-") as workdir, contextlib.redirect_stdout(log):
+        isolate_environment(workdir)
+        report = asyncio.run(run(args))
+        from core.pdf_extract import shutdown_pool
+        shutdown_pool()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import random
+
+# Lecture-like vocabulary so retrieval, glossary and quiz prompts see realistic text
+VOCABULARY = (
+    "hypothesis sample population variance mean median regression gradient neuron "
+    "activation entropy probability distribution estimator confidence interval "
+    "significance matrix vector eigenvalue derivative integral theorem proof lemma "
+    "algorithm complexity recursion memory cache network protocol energy momentum "
+    "velocity acceleration force reaction enzyme protein membrane cell tissue"
+).split()
+FILLER = "the of and to in is that for with as on by this are from which can".split()
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINES_PER_PAGE = 46
+WORDS_PER_LINE = 12
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(VOCABULARY if rng.random() < 0.4 else FILLER) for _ in range(WORDS_PER_LINE)]
+    return " ".join(words).capitalize() + "."
+
+
+def page_lines(page_number: int, rng: random.Random) -> list:
+    """Header, body text with the odd formula and citation, and a page-number footer."""
+    lines = ["Synthetic Lecture Notes - Benchmark Edition", f"Section {page_number}: {rng.choice(VOCABULARY).title()}"]
+    for i in range(LINES_PER_PAGE - 3):
+        if i % 15 == 7:
+            lines.append(f"y = {rng.randint(2, 9)}x + {rng.randint(1, 20)} describes the {rng.choice(VOCABULARY)}")
+        elif i % 15 == 11:
+            lines.append(f"{_sentence(rng)} ({rng.choice(['Smith', 'Lee', 'Garcia', 'Chen'])}, {rng.randint(1990, 2024)}) [{rng.randint(1, 40)}]")
+        else:
+            lines.append(_sentence(rng))
+    lines.append(f"Page {page_number}")
+    return lines
+
+
+def _content_stream(lines: list) -> bytes:
+    ops = ["BT", "/F1 10 Tf", "13 TL", f"50 {PAGE_HEIGHT - 50} Td"]
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def make_pdf(pages: int, seed: int = 0) -> bytes:
+    """
+    Hand-written minimal PDF (Helvetica text only) that pypdf/pdfplumber can parse.
+    The same (pages, seed) always produces the same bytes.
+    """
+    rng = random.Random(seed)
+    objects = []  # object bodies, numbered from 1
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    kids = []
+    for number in range(1, pages + 1):
+        stream = _content_stream(page_lines(number, rng))
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_obj, PAGE_WIDTH, PAGE_HEIGHT, font, content)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
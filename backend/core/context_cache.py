@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from core.job_store import job_store
+from core.metrics import registry
+
+# "gemini": the document is uploaded once into Gemini's cached-content store and
+#           chat turns only reference it (one cache per API key and model).
+# "local":  in-process stand-in with the same flow for offline runs and tests;
+#           the document is still re-sent on every turn.
+# "off":    no context cache, chat falls back to retrieval (members/member1/retrieval.py).
+CONTEXT_CACHE_MODE = os.getenv("CONTEXT_CACHE", "gemini")
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", 3600))
+# Gemini rejects contexts below a minimum token count; short documents go inline anyway
+CONTEXT_CACHE_MIN_CHARS = int(os.getenv("CONTEXT_CACHE_MIN_CHARS", 16000))
+CONTEXT_CACHE_MAX_DOCUMENTS = int(os.getenv("CONTEXT_CACHE_MAX_DOCUMENTS", 500))
+# Re-create a remote cache a little before it expires instead of racing the expiry
+EXPIRY_MARGIN = 60
+# After a transient create failure (429, timeout, 5xx) the pair is retried this soon;
+# only "unsupported / too small" refusals are remembered for the whole TTL
+CREATE_RETRY_SECONDS = float(os.getenv("CONTEXT_CACHE_RETRY_SECONDS", 60))
+# Error text of a create that will keep failing for this document and model
+PERMANENT_FAILURES = ("too small", "min_total_token_count", "not supported", "does not support",
+                      "unsupported", "404", "not found")
+# While another worker creates the same cache, wait this long before using the fallback prompt
+CREATE_WAIT_SECONDS = 15.0
+CREATE_POLL_SECONDS = 0.5
+
+CONTEXT_CACHE_EVENTS = registry.counter(
+    "context_cache_events_total",
+    "Document context cache use per chat attempt (created, hit, local, failed, unavailable, stale)",
+    ("event",))
+
+
+class DocumentContext:
+    """
+    One registered document (plus the system instruction it is used with).
+    Remote caches are created lazily per (key, model) pair on the first turn
+    that lands on that pair, then reused by every session of the document
+    until the TTL runs out. Cache names are published in the shared job
+    store (core/job_store.py), so all worker processes use one remote cache
+    per (document, key, model) and only one of them creates it. A pair that
+    refuses to cache the document (unsupported model, document too small) is
+    not retried until the TTL has passed; after a transient failure it is
+    retried after CREATE_RETRY_SECONDS, as is a cache the API reports gone.
+    Meanwhile its turns use the caller's fallback prompt.
+    """
+
+    def __init__(self, context_id: str, text: str, system_instruction: str):
+        self.id = context_id
+        self.text = text
+        self.system_instruction = system_instruction
+        self._remote = {}  # (key, model) -> (cache name or None, expires at)
+        self._lock = None
+
+    def inline(self, turn: str) -> str:
+        """The turn with the document in front of it (used by the local stand-in)."""
+        return f"""{self.system_instruction.strip()}
+
+=== DOCUMENT CONTENT (use only this) ===
+{self.text.strip()}
+
+{turn}"""
+
+    async def prepare(self, client, slot, turn: str):
+        """
+        (contents, cached_content name) for one attempt on `slot`, or None when
+        this pair has no usable cache and the full fallback prompt should be sent.
+        """
+        if CONTEXT_CACHE_MODE == "local":
+            CONTEXT_CACHE_EVENTS.inc(event="local")
+            return self.inline(turn), None
+
+        name = await self._remote_cache(client, slot)
+        if name is None:
+            return None
+        return turn, name
+
+    async def _remote_cache(self, client, slot):
+        cached = self._remote.get(slot)
+        if cached and cached[1] > time.time():
+            CONTEXT_CACHE_EVENTS.inc(event="hit" if cached[0] else "unavailable")
+            return cached[0]
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another turn may have created it while this one waited
+            cached = self._remote.get(slot)
+            if cached and cached[1] > time.time():
+                CONTEXT_CACHE_EVENTS.inc(event="hit" if cached[0] else "unavailable")
+                return cached[0]
+
+            shared_key = self._shared_key(slot)
+            waited = 0.0
+            while True:
+                entry = await asyncio.to_thread(job_store.result, shared_key)
+                if entry and entry["expires"] > time.time():
+                    # Created by another worker (or before a restart)
+                    self._remote[slot] = (entry["name"], entry["expires"])
+                    CONTEXT_CACHE_EVENTS.inc(event="hit" if entry["name"] else "unavailable")
+                    return entry["name"]
+                claimed = await asyncio.to_thread(
+                    job_store.claim, shared_key, CREATE_WAIT_SECONDS * 2, entry is not None)
+                if claimed:
+                    break
+                if waited >= CREATE_WAIT_SECONDS:
+                    CONTEXT_CACHE_EVENTS.inc(event="unavailable")
+                    return None
+                await asyncio.sleep(CREATE_POLL_SECONDS)
+                waited += CREATE_POLL_SECONDS
+
+            name, expires = await self._create(client, slot)
+            self._remote[slot] = (name, expires)
+            await asyncio.to_thread(job_store.finish, shared_key, {"name": name, "expires": expires})
+            return name
+
+    async def invalidate(self, slot, name: str):
+        """
+        Forget a remote cache the API no longer knows (expired early or deleted).
+        The pair uses the fallback prompt for CREATE_RETRY_SECONDS, and the stale
+        name is dropped from the shared store so the next worker re-creates it.
+        """
+        cached = self._remote.get(slot)
+        if not cached or cached[0] != name:
+            return  # already replaced by another turn
+        print(f"[ContextCache] Cache {name} of document {self.id[:12]} on {slot[1]} is gone; re-creating later")
+        CONTEXT_CACHE_EVENTS.inc(event="stale")
+        self._remote[slot] = (None, time.time() + CREATE_RETRY_SECONDS)
+        await asyncio.to_thread(
+            job_store.discard, self._shared_key(slot), {"name": name, "expires": cached[1]})
+
+    def _shared_key(self, slot) -> str:
+        # Never store the API key itself, only a fingerprint of it
+        key, model_name = slot
+        fingerprint = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        return f"context:{self.id}:{fingerprint}:{model_name}"
+
+    async def _create(self, client, slot) -> tuple:
+        """Create the remote cache on one pair; returns (name or None, expires at)."""
+        from google.genai import types
+        _, model_name = slot
+        try:
+            cache = await client.aio.caches.create(
+                model=model_name,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"document-{self.id[:16]}",
+                    system_instruction=self.system_instruction,
+                    contents=[self.text],
+                    ttl=f"{CONTEXT_CACHE_TTL}s",
+                ),
+            )
+            name = cache.name
+            CONTEXT_CACHE_EVENTS.inc(event="created")
+            print(f"[ContextCache] Cached document {self.id[:12]} on {model_name} ({len(self.text)} chars)")
+        except Exception as e:
+            CONTEXT_CACHE_EVENTS.inc(event="failed")
+            error_msg = str(e).lower()
+            if any(marker in error_msg for marker in PERMANENT_FAILURES):
+                print(f"[ContextCache] {model_name} cannot cache document {self.id[:12]}: {e}")
+                return None, time.time() + CONTEXT_CACHE_TTL - EXPIRY_MARGIN
+            print(f"[ContextCache] {model_name} could not cache document {self.id[:12]} "
+                  f"(retrying in {CREATE_RETRY_SECONDS:.0f}s): {e}")
+            return None, time.time() + CREATE_RETRY_SECONDS
+        return name, time.time() + CONTEXT_CACHE_TTL - EXPIRY_MARGIN
+
+    def remote_caches(self) -> int:
+        now = time.time()
+        return sum(1 for name, expires in self._remote.values() if name and expires > now)
+
+
+class ContextCache:
+    """
+    Registry of document contexts, keyed by a hash of the text and system
+    instruction so repeat uploads of the same PDF share one remote cache.
+    Least-recently-used documents are forgotten past max_documents (their
+    remote caches simply expire with the TTL).
+    """
+
+    def __init__(self, max_documents: int = CONTEXT_CACHE_MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, text: str, system_instruction: str = "") -> str:
+        """Register a document once (at upload); returns its context ID, or "" if it is not worth caching."""
+        if CONTEXT_CACHE_MODE == "off" or len(text or "") < CONTEXT_CACHE_MIN_CHARS:
+            return ""
+        h = hashlib.sha256(system_instruction.encode("utf-8"))
+        h.update(b"\0" + text.encode("utf-8"))
+        context_id = h.hexdigest()
+        with self._lock:
+            if context_id in self._contexts:
+                self._contexts.move_to_end(context_id)
+            else:
+                self._contexts[context_id] = DocumentContext(context_id, text, system_instruction)
+                while len(self._contexts) > self.max_documents:
+                    self._contexts.popitem(last=False)
+        return context_id
+
+    def get(self, context_id: str):
+        if not context_id:
+            return None
+        with self._lock:
+            context = self._contexts.get(context_id)
+            if context is not None:
+                self._contexts.move_to_end(context_id)
+            return context
+
+    def stats(self) -> dict:
+        with self._lock:
+            contexts = list(self._contexts.values())
+        return {
+            "mode": CONTEXT_CACHE_MODE,
+            "documents": len(contexts),
+            "remoteCaches": sum(c.remote_caches() for c in contexts),
+            "maxDocuments": self.max_documents,
+            "ttlSeconds": CONTEXT_CACHE_TTL,
+        }
+
+
+# Shared instance used by the chat endpoints
+context_cache = ContextCache()
@@ -0,0 +1,556 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Memory budget for all uploaded documents held by this process.
+# Defaults to 256 MB, which comfortably covers hundreds of lecture PDFs.
+DEFAULT_MAX_BYTES = int(os.getenv("DOCUMENT_STORE_MAX_BYTES", 256 * 1024 * 1024))
+DEFAULT_MAX_SESSIONS = int(os.getenv("DOCUMENT_STORE_MAX_SESSIONS", 1000))
+
+# "memory": per-process store (default); "sqlite": shared by every worker and kept across restarts
+DOCUMENT_STORE_BACKEND = os.getenv("DOCUMENT_STORE", "memory")
+DOCUMENT_STORE_PATH = os.getenv("DOCUMENT_STORE_PATH", os.path.join(BACKEND_DIR, "cache", "documents.sqlite3"))
+# Decoded document texts each worker keeps in memory (SQLite backend)
+TEXT_CACHE_BYTES = int(os.getenv("DOCUMENT_STORE_TEXT_CACHE_BYTES", 64 * 1024 * 1024))
+# Sessions whose in-process objects (chunk index) a worker keeps (SQLite backend)
+LOCAL_SESSIONS = int(os.getenv("DOCUMENT_STORE_LOCAL_SESSIONS", 128))
+# Fields that are Python objects rather than data; never written to SQLite
+LOCAL_FIELDS = ("index",)
+# Last-access times are only rewritten when older than this, to keep reads read-only
+ACCESS_RESOLUTION = 30
+
+QUERY_TERM = re.compile(r"\w{2,}")
+SNIPPET_CHARS = 160
+
+
+def _estimate_size(value) -> int:
+    """Rough byte footprint of a stored value (text dominates everything else)."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_size(v) for v in value)
+    if hasattr(value, "memory_bytes"):
+        return value.memory_bytes()
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return 64
+
+
+def _query_terms(query: str) -> list:
+    return list(dict.fromkeys(QUERY_TERM.findall((query or "").lower())))[:16]
+
+
+def _snippet(text: str, terms: list, width: int = SNIPPET_CHARS) -> str:
+    """A short window of the page around the first query term found in it."""
+    lowered = text.lower()
+    hits = [i for i in (lowered.find(t) for t in terms) if i >= 0]
+    start = max(0, min(hits) - width // 4) if hits else 0
+    snippet = " ".join(text[start:start + width].split())
+    return ("..." if start else "") + snippet + ("..." if start + width < len(text) else "")
+
+
+def _page_spans(offsets: list, length: int) -> list:
+    """(start, end) character span of every page; one page spanning everything if offsets are unknown."""
+    offsets = list(offsets or [0])
+    return list(zip(offsets, offsets[1:] + [length]))
+
+
+class DocumentStore:
+    """
+    Session-keyed store for uploaded documents.
+    Every upload gets its own session ID so students never overwrite each other.
+    Least-recently-used sessions are evicted once the memory cap is reached.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def create(self, text: str, filename: str = "", **fields) -> str:
+        """Store a new document and return its session ID."""
+        session_id = uuid.uuid4().hex
+        entry = {"text": text, "filename": filename, **fields}
+        with self._lock:
+            self._put(session_id, entry)
+        return session_id
+
+    def get(self, session_id: str):
+        """Return the stored document (a dict) or None if unknown/evicted."""
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+            return entry
+
+    def get_text(self, session_id: str) -> str:
+        entry = self.get(session_id)
+        return entry["text"] if entry else ""
+
+    def update(self, session_id: str, **fields) -> bool:
+        """Attach extra data (indexes, analysis results) to an existing session."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return False
+            self._put(session_id, {**entry, **fields})
+            return True
+
+    def modify(self, session_id: str, field: str, fn, default=None):
+        """
+        Atomically replace one field with fn(current value), e.g. appending a
+        chat turn, so concurrent requests on a session never lose an update.
+        Returns the new value, or None if the session is unknown.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            value = fn(entry.get(field, default))
+            self._put(session_id, {**entry, field: value})
+            return value
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._remove(session_id)
+
+    def get_page(self, session_id: str, page: int):
+        """Text of one 1-based page, or None."""
+        entry = self.get(session_id)
+        if entry is None:
+            return None
+        spans = _page_spans(entry.get("pageOffsets"), len(entry["text"]))
+        if not 1 <= page <= len(spans):
+            return None
+        start, end = spans[page - 1]
+        return entry["text"][start:end]
+
+    def search(self, session_id: str, query: str, limit: int = 5) -> list:
+        """Pages that match the query best: [{"page", "score", "snippet"}]."""
+        entry = self.get(session_id)
+        terms = _query_terms(query)
+        if entry is None or not terms:
+            return []
+        text = entry["text"]
+        results = []
+        for page, (start, end) in enumerate(_page_spans(entry.get("pageOffsets"), len(text)), start=1):
+            page_text = text[start:end]
+            lowered = page_text.lower()
+            score = sum(lowered.count(t) for t in terms)
+            if score:
+                results.append({"page": page, "score": float(score), "snippet": _snippet(page_text, terms)})
+        results.sort(key=lambda r: -r["score"])
+        return results[:limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._entries),
+                "bytes": self._total_bytes,
+                "maxBytes": self.max_bytes,
+                "maxSessions": self.max_sessions,
+            }
+
+    def __contains__(self, session_id) -> bool:
+        with self._lock:
+            return session_id in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # --- internal helpers (caller holds the lock) ---
+    def _put(self, session_id: str, entry: dict):
+        self._remove(session_id)
+        size = _estimate_size(entry)
+        self._entries[session_id] = entry
+        self._sizes[session_id] = size
+        self._total_bytes += size
+        self._evict(keep=session_id)
+
+    def _remove(self, session_id: str):
+        if session_id in self._entries:
+            del self._entries[session_id]
+            self._total_bytes -= self._sizes.pop(session_id, 0)
+
+    def _evict(self, keep: str):
+        while self._entries and (
+            self._total_bytes > self.max_bytes or len(self._entries) > self.max_sessions
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                # A single document larger than the cap is still kept for its owner
+                break
+            print(f"[DocumentStore] Evicting session {oldest} (LRU)")
+            self._remove(oldest)
+
+
+class SQLiteDocumentStore:
+    """
+    Document store shared by every worker process (uvicorn --workers N) that
+    also survives restarts, with the same interface as DocumentStore.
+    - sessions: one row per upload (filename plus JSON fields such as the chat
+      history and analysis results), pointing at a document by content hash,
+      so a whole class uploading the same PDF stores its text once.
+    - documents: the UTF-8 text lives in a blob file next to the database and
+      is read through mmap, so workers share the OS page cache and a single
+      page can be read without decoding the whole document.
+    - pages / pages_fts: per-page offsets and a contentless FTS5 index for search().
+    Python objects (the chat chunk index) cannot be shared; they stay in a
+    per-process cache and are rebuilt by whichever worker needs them.
+    Least-recently-used sessions are evicted past max_sessions / max_bytes,
+    and documents no session points at any more are deleted with them.
+    """
+
+    def __init__(self, path: str = DOCUMENT_STORE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.path = path
+        self.blob_dir = os.path.join(os.path.dirname(path), "documents")
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._texts = OrderedDict()  # digest -> (text, page offsets)
+        self._text_bytes = 0
+        self._local = OrderedDict()  # session_id -> {field: object}
+
+    def _db(self) -> sqlite3.Connection:
+        # A connection must not cross a fork, so each worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(self.blob_dir, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " digest TEXT PRIMARY KEY,"
+                " chars INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " digest TEXT NOT NULL,"
+                " filename TEXT NOT NULL,"
+                " fields TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_accessed ON sessions(accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_digest ON sessions(digest)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " id INTEGER PRIMARY KEY,"
+                " digest TEXT NOT NULL,"
+                " page INTEGER NOT NULL,"
+                " char_start INTEGER NOT NULL,"
+                " byte_start INTEGER NOT NULL,"
+                " byte_end INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_digest ON pages(digest, page)")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(body, content='')")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # --- public API (same as DocumentStore) ---
+    def create(self, text: str, filename: str = "", **fields) -> str:
+        """Store a new document and return its session ID."""
+        session_id = uuid.uuid4().hex
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        offsets = fields.pop("pageOffsets", None) or [0]
+        local = {name: fields.pop(name) for name in LOCAL_FIELDS if name in fields}
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._ensure_document(db, digest, text, offsets)
+                db.execute(
+                    "INSERT INTO sessions (id, digest, filename, fields, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, digest, filename, json.dumps(fields), now, now),
+                )
+                self._evict(db, keep=session_id)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._cache_text(digest, text, offsets)
+            self._remember_local(session_id, local)
+        return session_id
+
+    def get(self, session_id: str):
+        """Return the stored document (a dict) or None if unknown/evicted."""
+        if not session_id:
+            return None
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT digest, filename, fields, accessed FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                digest, filename, fields, accessed = row
+                now = time.time()
+                if now - accessed > ACCESS_RESOLUTION:
+                    db.execute("UPDATE sessions SET accessed = ? WHERE id = ?", (now, session_id))
+                text, offsets = self._load_text(db, digest)
+                local = self._local.get(session_id, {})
+                if local:
+                    self._local.move_to_end(session_id)
+        except (sqlite3.Error, OSError) as e:
+            print(f"[DocumentStore] Read of session {session_id} failed: {e}")
+            return None
+        return {"text": text, "filename": filename, "pageOffsets": offsets, **json.loads(fields), **local}
+
+    def get_text(self, session_id: str) -> str:
+        entry = self.get(session_id)
+        return entry["text"] if entry else ""
+
+    def update(self, session_id: str, **fields) -> bool:
+        """Attach extra data (indexes, analysis results) to an existing session."""
+        local = {name: fields.pop(name) for name in LOCAL_FIELDS if name in fields}
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT fields FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is not None and fields:
+                    db.execute(
+                        "UPDATE sessions SET fields = ? WHERE id = ?",
+                        (json.dumps({**json.loads(row[0]), **fields}), session_id),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if row is None:
+                return False
+            if local:
+                self._remember_local(session_id, {**self._local.get(session_id, {}), **local})
+            return True
+
+    def modify(self, session_id: str, field: str, fn, default=None):
+        """Atomically replace one JSON field with fn(current value), across every worker process."""
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT fields FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                value = None
+                if row is not None:
+                    fields = json.loads(row[0])
+                    value = fn(fields.get(field, default))
+                    fields[field] = value
+                    db.execute("UPDATE sessions SET fields = ? WHERE id = ?", (json.dumps(fields), session_id))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            return value
+
+    def delete(self, session_id: str):
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._collect_documents(db)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._local.pop(session_id, None)
+
+    def get_page(self, session_id: str, page: int):
+        """Text of one 1-based page, read straight from the memory-mapped blob."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT p.digest, p.byte_start, p.byte_end FROM sessions s"
+                " JOIN pages p ON p.digest = s.digest WHERE s.id = ? AND p.page = ?",
+                (session_id, page),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._read_range(*row)
+
+    def search(self, session_id: str, query: str, limit: int = 5) -> list:
+        """Pages that match the query best (FTS5 bm25): [{"page", "score", "snippet"}]."""
+        terms = _query_terms(query)
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        try:
+            with self._lock:
+                rows = self._db().execute(
+                    "SELECT p.digest, p.page, p.byte_start, p.byte_end, bm25(pages_fts) AS score"
+                    " FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid"
+                    " JOIN sessions s ON s.digest = p.digest"
+                    " WHERE pages_fts MATCH ? AND s.id = ? ORDER BY score LIMIT ?",
+                    (match, session_id, limit),
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"[DocumentStore] Search failed: {e}")
+            return []
+        return [
+            {"page": page, "score": -score, "snippet": _snippet(self._read_range(digest, start, end), terms)}
+            for digest, page, start, end, score in rows
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+            sessions = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            documents, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents").fetchone()
+            return {
+                "backend": "sqlite",
+                "sessions": sessions,
+                "documents": documents,
+                "bytes": size,
+                "maxBytes": self.max_bytes,
+                "maxSessions": self.max_sessions,
+                "cachedTextBytes": self._text_bytes,
+                "localSessions": len(self._local),
+            }
+
+    def __contains__(self, session_id) -> bool:
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    # --- internal helpers (caller holds the lock) ---
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, f"{digest}.txt")
+
+    def _ensure_document(self, db: sqlite3.Connection, digest: str, text: str, offsets: list):
+        """Write the blob, page rows and FTS rows of a document not stored yet (inside the write transaction)."""
+        path = self._blob_path(digest)
+        exists = db.execute("SELECT 1 FROM documents WHERE digest = ?", (digest,)).fetchone()
+        if exists and os.path.exists(path):
+            return
+        data = text.encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)  # atomic, so readers never see half a file
+        if exists:
+            return
+
+        db.execute(
+            "INSERT INTO documents (digest, chars, size, created) VALUES (?, ?, ?, ?)",
+            (digest, len(text), len(data), time.time()),
+        )
+        byte_start = 0
+        for page, (start, end) in enumerate(_page_spans(offsets, len(text)), start=1):
+            body = text[start:end]
+            byte_end = byte_start + len(body.encode("utf-8"))
+            cursor = db.execute(
+                "INSERT INTO pages (digest, page, char_start, byte_start, byte_end) VALUES (?, ?, ?, ?, ?)",
+                (digest, page, start, byte_start, byte_end),
+            )
+            db.execute("INSERT INTO pages_fts (rowid, body) VALUES (?, ?)", (cursor.lastrowid, body))
+            byte_start = byte_end
+
+    def _load_text(self, db: sqlite3.Connection, digest: str) -> tuple:
+        cached = self._texts.get(digest)
+        if cached is not None:
+            self._texts.move_to_end(digest)
+            return cached
+        with open(self._blob_path(digest), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            text = m[:].decode("utf-8")
+        offsets = [r[0] for r in db.execute("SELECT char_start FROM pages WHERE digest = ? ORDER BY page", (digest,))]
+        self._cache_text(digest, text, offsets)
+        return text, offsets
+
+    def _read_range(self, digest: str, start: int, end: int) -> str:
+        try:
+            with open(self._blob_path(digest), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return m[start:end].decode("utf-8", errors="replace")
+        except (OSError, ValueError):
+            # ValueError: mmap of an empty file
+            return ""
+
+    def _cache_text(self, digest: str, text: str, offsets: list):
+        if digest in self._texts:
+            return
+        self._texts[digest] = (text, offsets)
+        self._text_bytes += len(text)
+        while self._text_bytes > TEXT_CACHE_BYTES and len(self._texts) > 1:
+            _, (old_text, _) = self._texts.popitem(last=False)
+            self._text_bytes -= len(old_text)
+
+    def _remember_local(self, session_id: str, local: dict):
+        if not local:
+            return
+        self._local[session_id] = local
+        self._local.move_to_end(session_id)
+        while len(self._local) > LOCAL_SESSIONS:
+            self._local.popitem(last=False)
+
+    def _evict(self, db: sqlite3.Connection, keep: str):
+        while True:
+            sessions = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            size = db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+            if sessions <= self.max_sessions and size <= self.max_bytes:
+                return
+            oldest = db.execute(
+                "SELECT id FROM sessions WHERE id != ? ORDER BY accessed ASC LIMIT 1", (keep,)
+            ).fetchone()
+            if oldest is None:
+                # A single document larger than the cap is still kept for its owner
+                return
+            print(f"[DocumentStore] Evicting session {oldest[0]} (LRU)")
+            db.execute("DELETE FROM sessions WHERE id = ?", oldest)
+            self._local.pop(oldest[0], None)
+            self._collect_documents(db)
+
+    def _collect_documents(self, db: sqlite3.Connection):
+        """Delete documents no session points at any more (blob, pages and FTS rows)."""
+        orphans = [r[0] for r in db.execute(
+            "SELECT digest FROM documents WHERE digest NOT IN (SELECT digest FROM sessions)"
+        )]
+        for digest in orphans:
+            pages = db.execute("SELECT id, byte_start, byte_end FROM pages WHERE digest = ?", (digest,)).fetchall()
+            # A contentless FTS5 row is removed by replaying its original text
+            for rowid, start, end in pages:
+                db.execute(
+                    "INSERT INTO pages_fts (pages_fts, rowid, body) VALUES ('delete', ?, ?)",
+                    (rowid, self._read_range(digest, start, end)),
+                )
+            db.execute("DELETE FROM pages WHERE digest = ?", (digest,))
+            db.execute("DELETE FROM documents WHERE digest = ?", (digest,))
+            cached = self._texts.pop(digest, None)
+            if cached is not None:
+                self._text_bytes -= len(cached[0])
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+
+# Shared instance used by the API (DOCUMENT_STORE=sqlite for multi-worker deployments)
+document_store = SQLiteDocumentStore() if DOCUMENT_STORE_BACKEND == "sqlite" else DocumentStore()
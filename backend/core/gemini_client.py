@@ -1,9 +1,15 @@
+import asyncio
 import os
-import time
+import json
 import random
-from google import genai
+import time
 from dotenv import load_dotenv
 
+from core.metrics import registry, SIZE_BUCKETS
+from core.rate_limiter import RateLimiter
+from core.json_parser import is_llm_json
+from core.llm_cache import llm_cache, prompt_key
+
 # Load environment variables
 load_dotenv()
 
@@ -22,52 +28,387 @@ AVAILABLE_MODELS = [
     'gemini-3.0-flash'
 ]
 
-def call_gemini(prompt: str) -> str:
+# Requests-per-minute budget for each model (per API key).
+# Models without an entry use DEFAULT_RPM.
+MODEL_RPM = {
+    'gemini-2.5-flash-lite': 10,
+    'gemini-2.5-flash': 5,
+    'gemini-2.0-flash': 15,
+}
+DEFAULT_RPM = float(os.getenv("GEMINI_DEFAULT_RPM", 5))
+
+MAX_RETRIES = 3
+# How long a call may wait in the local queue for a free (key, model) slot
+QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", 60))
+
+EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "gemini-embedding-001")
+EMBEDDING_BATCH = 100
+
+OVERLOADED_MESSAGE = "AI Error: The system is overloaded or unavailable. Please try again later."
+# JSON type a structured answer must parse to before it is cached (ARRAY answers
+# may come wrapped in an object, see parse_json_list)
+_SCHEMA_TYPES = {"ARRAY": (list, dict), "OBJECT": dict}
+
+rate_limiter = RateLimiter(MODEL_RPM, DEFAULT_RPM)
+
+GEMINI_LATENCY = registry.histogram(
+    "gemini_request_duration_seconds", "Latency of one Gemini API attempt", ("key", "model", "outcome"))
+GEMINI_ERRORS = registry.counter(
+    "gemini_errors_total", "Failed Gemini attempts by cause (rate_limited = 429, not_found = 404, stale_cache = 404 on a cached context)",
+    ("key", "model", "cause"))
+GEMINI_RETRIES = registry.counter(
+    "gemini_retries_total", "Gemini attempts made after an earlier attempt of the same call failed", ("key", "model"))
+GEMINI_QUEUE_WAIT = registry.histogram(
+    "gemini_queue_wait_seconds", "Time a call waited locally for a (key, model) pair with RPM budget")
+GEMINI_PROMPT_CHARS = registry.histogram(
+    "gemini_prompt_chars", "Prompt size in characters", ("call",), buckets=SIZE_BUCKETS)
+GEMINI_RESPONSE_CHARS = registry.histogram(
+    "gemini_response_chars", "Response size in characters", ("call",), buckets=SIZE_BUCKETS)
+LLM_CACHE_LOOKUPS = registry.counter(
+    "llm_cache_lookups_total", "LLM response cache lookups", ("result",))
+
+# One client per API key, shared by every request (sync and async)
+_CLIENTS = {}
+
+
+def get_client(api_key: str):
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        # google-genai takes most of a second to import, so it loads on first use
+        # (or during the start-up warm-up, see warm_up_clients)
+        from google import genai
+        client = genai.Client(api_key=api_key)
+        _CLIENTS[api_key] = client
+    return client
+
+
+def warm_up_clients():
+    """Import the SDK and create every key's client ahead of the first request."""
+    from google.genai import types  # noqa: F401 (used by _generation_config)
+    for key in AVAILABLE_KEYS:
+        get_client(key)
+
+
+def requests_available() -> int:
+    """Requests the configured pairs could send right now without queueing."""
+    return rate_limiter.available([(key, model) for key in AVAILABLE_KEYS for model in AVAILABLE_MODELS])
+
+
+def _key_name(key_index: int) -> str:
+    return "Primary Key" if key_index == 0 else f"Alternate Key {key_index}"
+
+
+def _slot_labels(slot) -> dict:
+    # Never put the key itself in a metric label
+    key, model_name = slot
+    key_index = AVAILABLE_KEYS.index(key)
+    return {"key": "primary" if key_index == 0 else f"alt{key_index}", "model": model_name}
+
+
+class _CallPlan:
+    """
+    The (key, model) pairs one call may still use, plus its retry budget.
+    Rate-limited pairs stay in the plan (the limiter queues until they refill);
+    offline models and invalid keys are dropped for the rest of the call.
+    A 404 on an attempt that referenced a cached context means the cache is
+    gone, not the model, so that pair stays too.
+    """
+
+    def __init__(self, prompt: str, call: str = "generate"):
+        self.call = call
+        GEMINI_PROMPT_CHARS.observe(len(prompt), call=call)
+        # LOAD BALANCING: Shuffle the models so ties between equally idle models are spread out
+        models_to_try = AVAILABLE_MODELS.copy()
+        random.shuffle(models_to_try)
+        self.candidates = [(key, model) for key in AVAILABLE_KEYS for model in models_to_try]
+        self.attempts_left = MAX_RETRIES * len(self.candidates)
+        self.failures = 0
+        self.started = None
+
+    def has_next(self) -> bool:
+        return bool(self.candidates) and self.attempts_left > 0
+
+    async def next_slot(self):
+        """Wait for a pair with RPM budget; None if none frees up within QUEUE_TIMEOUT."""
+        waited = time.perf_counter()
+        slot = await rate_limiter.acquire(self.candidates, QUEUE_TIMEOUT)
+        return self._begin(slot, waited)
+
+    def next_slot_blocking(self):
+        waited = time.perf_counter()
+        slot = rate_limiter.acquire_blocking(self.candidates, QUEUE_TIMEOUT)
+        return self._begin(slot, waited)
+
+    def _begin(self, slot, waited: float):
+        self.started = time.perf_counter()
+        GEMINI_QUEUE_WAIT.observe(self.started - waited)
+        if slot is None:
+            print("No Gemini capacity freed up in time. Giving up.")
+        elif self.failures:
+            GEMINI_RETRIES.inc(**_slot_labels(slot))
+        return slot
+
+    def record_success(self, slot, text: str):
+        GEMINI_LATENCY.observe(time.perf_counter() - self.started, outcome="ok", **_slot_labels(slot))
+        GEMINI_RESPONSE_CHARS.observe(len(text or ""), call=self.call)
+
+    def record_error(self, e: Exception, slot, cached_content: str = None) -> bool:
+        """Returns True when the error was a stale cached_content (the caller invalidates it)."""
+        self.attempts_left -= 1
+        self.failures += 1
+        labels = _slot_labels(slot)
+        GEMINI_LATENCY.observe(time.perf_counter() - self.started, outcome="error", **labels)
+        key, model_name = slot
+        key_name = _key_name(AVAILABLE_KEYS.index(key))
+        error_msg = str(e).lower()
+
+        if "429" in error_msg or "exhausted" in error_msg or "quota" in error_msg:
+            print(f"[{key_name}] {model_name} rate-limited (429). Waiting for its budget to refill...")
+            GEMINI_ERRORS.inc(cause="rate_limited", **labels)
+            rate_limiter.penalize(slot)
+        elif ("404" in error_msg or "not found" in error_msg) and cached_content:
+            print(f"[{key_name}] {model_name} no longer has {cached_content} (404). Retrying with the full prompt...")
+            GEMINI_ERRORS.inc(cause="stale_cache", **labels)
+            return True
+        elif "404" in error_msg or "not found" in error_msg:
+            print(f"[{key_name}] {model_name} is offline (404). Skipping...")
+            GEMINI_ERRORS.inc(cause="not_found", **labels)
+            self.candidates.remove(slot)
+        elif "400" in error_msg and "api_key" in error_msg:
+            print(f"[{key_name}] API Key is invalid. Breaking to next key...")
+            GEMINI_ERRORS.inc(cause="invalid_key", **labels)
+            self.candidates = [c for c in self.candidates if c[0] != key]
+        else:
+            print(f"[{key_name}] Unknown error on {model_name}: {e}. Skipping...")
+            GEMINI_ERRORS.inc(cause="other", **labels)
+        return False
+
+
+def _cache_lookup(prompt: str, use_cache: bool, response_schema=None):
+    if not use_cache:
+        return None, None
+    if response_schema is None:
+        key = prompt_key(prompt)
+    else:
+        key = prompt_key(prompt, json.dumps(response_schema, sort_keys=True))
+    cached = llm_cache.get(key)
+    LLM_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+    return key, cached
+
+
+def _generation_config(response_schema, cached_content: str = None):
+    # Every model in AVAILABLE_MODELS supports response_schema (structured JSON output)
+    if response_schema is None and cached_content is None:
+        return None
+    from google.genai import types
+    options = {"cached_content": cached_content} if cached_content else {}
+    if response_schema is not None:
+        options.update(response_mime_type="application/json", response_schema=response_schema)
+    return types.GenerateContentConfig(**options)
+
+
+def _fallback_prompt(prompt):
+    """
+    Async getter for the self-contained prompt. `prompt` is a str or an async
+    factory returning one; a factory runs at most once, and only when needed.
+    """
+    built = [prompt] if isinstance(prompt, str) else []
+
+    async def get() -> str:
+        if not built:
+            built.append(await prompt())
+        return built[0]
+    return get
+
+
+def _cache_text(prompt, cached_context, cached_prompt):
+    # With a document context the answer depends on the document and the turn,
+    # so the fallback prompt does not have to be built just to key the cache
+    if cached_context is not None:
+        return f"context:{cached_context.id}\0{cached_prompt}"
+    return prompt
+
+
+async def _attempt_contents(fallback, slot, cached_context, cached_prompt):
+    """
+    (contents, cached_content name) for one attempt. With a document context
+    (core/context_cache.py) only cached_prompt is sent when the pair has the
+    document cached; otherwise the self-contained fallback() prompt is.
+    """
+    if cached_context is not None:
+        prepared = await cached_context.prepare(get_client(slot[0]), slot, cached_prompt)
+        if prepared is not None:
+            return prepared
+    return await fallback(), None
+
+
+def _cache_store(key, text, response_schema=None):
+    # Never cache failures or empty answers
+    if not key or not text or text.startswith("AI Error"):
+        return
+    # Nor a structured answer that does not parse (e.g. cut off mid-JSON): every
+    # later caller would get the same broken answer until the entry expires
+    expect = _SCHEMA_TYPES.get(str((response_schema or {}).get("type", "")).upper())
+    if response_schema is not None and not is_llm_json(text, expect):
+        print("[LLMCache] Structured answer is not valid JSON; not caching it")
+        return
+    llm_cache.put(key, text)
+
+
+def call_gemini(prompt: str, use_cache: bool = True, response_schema=None) -> str:
+    """
+    Blocking call. Only use this outside the FastAPI event loop.
+    Identical prompts are answered from the on-disk cache unless use_cache=False.
+    With a response_schema the model is asked for JSON matching it.
+    """
     if not AVAILABLE_KEYS:
         return "AI Error: No API keys configured."
 
-    max_retries = 3
-    base_delay = 2
-
-    # LOAD BALANCING: Shuffle the models so concurrent requests don't all hit the same model first
-    models_to_try = AVAILABLE_MODELS.copy()
-    random.shuffle(models_to_try)
-
-    for attempt in range(max_retries):
-        for key_index, current_key in enumerate(AVAILABLE_KEYS):
-            # NEW SDK SYNTAX: Initialize the Client
-            client = genai.Client(api_key=current_key)
-            key_name = "Primary Key" if key_index == 0 else f"Alternate Key {key_index}"
-
-            for model_name in models_to_try:
-                try:
-                    # NEW SDK SYNTAX: Call generate_content via client.models
-                    response = client.models.generate_content(
-                        model=model_name,
-                        contents=prompt
-                    )
-                    return response.text
-                    
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    
-                    if "429" in error_msg or "exhausted" in error_msg or "quota" in error_msg:
-                        print(f"[Attempt {attempt + 1} | {key_name}] {model_name} rate-limited (429). Skipping...")
-                        continue 
-                    elif "404" in error_msg or "not found" in error_msg:
-                        print(f"[Attempt {attempt + 1} | {key_name}] {model_name} is offline (404). Skipping...")
-                        continue
-                    elif "400" in error_msg and "api_key" in error_msg:
-                        print(f"[{key_name}] API Key is invalid. Breaking to next key...")
-                        break 
-                    else:
-                        print(f"[{key_name}] Unknown error on {model_name}: {e}. Skipping...")
-                        continue 
-            
-            print(f"[{key_name}] All models failed. Switching to next API key if available...")
-
-        wait_time = base_delay * (2 ** attempt)
-        print(f"All keys and models failed. Sleeping for {wait_time} seconds before retrying...")
-        time.sleep(wait_time)
-
-    return "AI Error: The system is overloaded or unavailable. Please try again later."
+    cache_key, cached = _cache_lookup(prompt, use_cache, response_schema)
+    if cached is not None:
+        return cached
+
+    plan = _CallPlan(prompt)
+    while plan.has_next():
+        slot = plan.next_slot_blocking()
+        if slot is None:
+            break
+        key, model_name = slot
+        try:
+            response = get_client(key).models.generate_content(
+                model=model_name,
+                contents=prompt,
+                config=_generation_config(response_schema)
+            )
+            plan.record_success(slot, response.text)
+            _cache_store(cache_key, response.text, response_schema)
+            return response.text
+        except Exception as e:
+            plan.record_error(e, slot)
+
+    return OVERLOADED_MESSAGE
+
+
+async def call_gemini_async(prompt, use_cache: bool = True, response_schema=None,
+                            cached_context=None, cached_prompt: str = None) -> str:
+    """
+    Non-blocking version of call_gemini for the async endpoints.
+    Each attempt is routed to the (key, model) pair with the most RPM budget
+    left; when every pair is spent the call queues (asyncio.sleep) until one
+    refills instead of firing requests that would come back as 429s.
+    Pass use_cache=False when the caller wants a fresh answer (e.g. "regenerate"),
+    and a response_schema (JSON schema dict) to get structured JSON output.
+    With cached_context (a DocumentContext) only cached_prompt is sent where
+    the document is cached; `prompt` stays the self-contained fallback and may
+    then be an async factory, so it is only built when a pair needs it.
+    """
+    if not AVAILABLE_KEYS:
+        return "AI Error: No API keys configured."
+
+    fallback = _fallback_prompt(prompt)
+    if cached_context is None:
+        prompt = await fallback()
+    # SQLite I/O runs in a worker thread, off the event loop
+    cache_key, cached = await asyncio.to_thread(
+        _cache_lookup, _cache_text(prompt, cached_context, cached_prompt), use_cache, response_schema)
+    if cached is not None:
+        return cached
+
+    plan = _CallPlan(prompt if cached_context is None else cached_prompt)
+    while plan.has_next():
+        slot = await plan.next_slot()
+        if slot is None:
+            break
+        key, model_name = slot
+        cached_content = None
+        try:
+            contents, cached_content = await _attempt_contents(fallback, slot, cached_context, cached_prompt)
+            response = await get_client(key).aio.models.generate_content(
+                model=model_name,
+                contents=contents,
+                config=_generation_config(response_schema, cached_content)
+            )
+            plan.record_success(slot, response.text)
+            await asyncio.to_thread(_cache_store, cache_key, response.text, response_schema)
+            return response.text
+        except Exception as e:
+            if plan.record_error(e, slot, cached_content):
+                await cached_context.invalidate(slot, cached_content)
+
+    return OVERLOADED_MESSAGE
+
+
+async def stream_gemini_async(prompt, use_cache: bool = True, cached_context=None, cached_prompt: str = None):
+    """
+    Async generator yielding the answer text piece by piece as Gemini produces it.
+    Fails over to another (key, model) only before the first piece has been sent;
+    after that a mid-stream error is raised to the caller.
+    cached_context / cached_prompt work as in call_gemini_async.
+    """
+    if not AVAILABLE_KEYS:
+        yield "AI Error: No API keys configured."
+        return
+
+    fallback = _fallback_prompt(prompt)
+    if cached_context is None:
+        prompt = await fallback()
+    cache_key, cached = await asyncio.to_thread(
+        _cache_lookup, _cache_text(prompt, cached_context, cached_prompt), use_cache)
+    if cached is not None:
+        yield cached
+        return
+
+    plan = _CallPlan(prompt if cached_context is None else cached_prompt, "stream")
+    while plan.has_next():
+        slot = await plan.next_slot()
+        if slot is None:
+            break
+        key, model_name = slot
+        pieces = []
+        cached_content = None
+        try:
+            contents, cached_content = await _attempt_contents(fallback, slot, cached_context, cached_prompt)
+            stream = await get_client(key).aio.models.generate_content_stream(
+                model=model_name,
+                contents=contents,
+                config=_generation_config(None, cached_content)
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    pieces.append(chunk.text)
+                    yield chunk.text
+            answer = "".join(pieces)
+            plan.record_success(slot, answer)
+            await asyncio.to_thread(_cache_store, cache_key, answer)
+            return
+        except Exception as e:
+            if pieces:
+                raise
+            if plan.record_error(e, slot, cached_content):
+                await cached_context.invalidate(slot, cached_content)
+
+    yield OVERLOADED_MESSAGE
+
+async def embed_texts_async(texts: list):
+    """
+    Embed a list of texts with the Gemini embedding model.
+    Returns a list of vectors, or None if no key could serve the request.
+    """
+    if not AVAILABLE_KEYS or not texts:
+        return None
+
+    for key_index, current_key in enumerate(AVAILABLE_KEYS):
+        client = get_client(current_key)
+        try:
+            vectors = []
+            for start in range(0, len(texts), EMBEDDING_BATCH):
+                result = await client.aio.models.embed_content(
+                    model=EMBEDDING_MODEL,
+                    contents=texts[start:start + EMBEDDING_BATCH]
+                )
+                vectors.extend(e.values for e in result.embeddings)
+            return vectors
+        except Exception as e:
+            print(f"[{_key_name(key_index)}] Embedding failed: {e}. Switching to next API key if available...")
+
+    return None
@@ -0,0 +1,173 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Background job state shared by every uvicorn worker (and kept across restarts),
+# so a status poll can land on any worker, not just the one running the job.
+JOB_STORE_PATH = os.getenv(
+    "JOB_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "jobs.sqlite3"),
+)
+MAX_JOBS = int(os.getenv("JOB_STORE_MAX_JOBS", 5000))
+# A queued/running job not updated for this long belonged to a worker that died
+STALE_JOB_SECONDS = float(os.getenv("JOB_STALE_SECONDS", 3 * 3600))
+# Keyed results (rendered videos, context cache names) older than this are pruned,
+# and the oldest go once there are more than MAX_RESULTS
+RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", 7 * 24 * 3600))
+MAX_RESULTS = int(os.getenv("JOB_STORE_MAX_RESULTS", 20000))
+
+
+class JobStore:
+    """
+    SQLite table of job snapshots (Job.to_dict()) plus keyed results with
+    claims, used to de-duplicate work across processes: the first worker to
+    claim a key does the work, the others wait for its result.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, max_jobs: int = MAX_JOBS,
+                 result_ttl: float = RESULT_TTL_SECONDS, max_results: int = MAX_RESULTS):
+        self.path = path
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _db(self) -> sqlite3.Connection:
+        # A connection must not cross a fork, so each worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " state TEXT NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated ON jobs(updated)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_updated ON results(updated)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # --- job snapshots ---
+    def save(self, state: dict):
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO jobs (id, state, updated) VALUES (?, ?, ?)",
+                    (state["jobId"], json.dumps(state), now),
+                )
+                count = db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+                if count > self.max_jobs:
+                    db.execute(
+                        "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs ORDER BY updated ASC LIMIT ?)",
+                        (count - self.max_jobs,),
+                    )
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"[JobStore] Could not save job {state.get('jobId')}: {e}")
+
+    def load(self, job_id: str):
+        try:
+            with self._lock:
+                row = self._db().execute("SELECT state, updated FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"[JobStore] Could not read job {job_id}: {e}")
+            return None
+        if row is None:
+            return None
+        state = json.loads(row[0])
+        if state["status"] in ("queued", "running") and time.time() - row[1] > STALE_JOB_SECONDS:
+            state["status"] = "failed"
+            state["error"] = "The worker running this job stopped"
+        return state
+
+    # --- keyed results with claims ---
+    def result(self, key: str):
+        """The finished result stored under key, or None."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT result FROM results WHERE key = ? AND status = 'done'", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def claim(self, key: str, stale_after: float, replace_done: bool = False) -> bool:
+        """
+        Take the key for this worker. False while another worker's claim is
+        fresher than stale_after seconds (or a result exists, unless replace_done).
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT status, updated FROM results WHERE key = ?", (key,)).fetchone()
+                free = (
+                    row is None
+                    or (row[0] == "done" and replace_done)
+                    or (row[0] == "running" and now - row[1] > stale_after)
+                )
+                if free:
+                    db.execute(
+                        "INSERT OR REPLACE INTO results (key, status, result, updated) VALUES (?, 'running', NULL, ?)",
+                        (key, now),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return free
+
+    def finish(self, key: str, result: dict):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO results (key, status, result, updated) VALUES (?, 'done', ?, ?)",
+                (key, json.dumps(result), now),
+            )
+            self._prune_results(db, now)
+            db.commit()
+
+    def _prune_results(self, db: sqlite3.Connection, now: float):
+        db.execute("DELETE FROM results WHERE updated < ?", (now - self.result_ttl,))
+        count = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_results:
+            db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY updated ASC LIMIT ?)",
+                (count - self.max_results,),
+            )
+
+    def discard(self, key: str, result: dict):
+        """Drop the finished result under key, unless another worker has replaced it meanwhile."""
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "DELETE FROM results WHERE key = ? AND status = 'done' AND result = ?",
+                (key, json.dumps(result)),
+            )
+            db.commit()
+
+    def release(self, key: str):
+        """Drop an unfinished claim so another worker can take the key."""
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM results WHERE key = ? AND status = 'running'", (key,))
+            db.commit()
+
+
+# Shared instance used by the job queues
+job_store = JobStore()
@@ -0,0 +1,159 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class Job:
+    """A background job with per-stage progress that the status endpoint can report."""
+
+    def __init__(self, stage_names: list, store=None):
+        self.id = uuid.uuid4().hex
+        self.store = store
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.stages = OrderedDict(
+            (name, {"status": "pending", "seconds": None, "error": None}) for name in stage_names
+        )
+
+    def stage(self, name: str):
+        return _StageProgress(self, name)
+
+    def skip(self, *names, reason: str = "skipped"):
+        for name in names:
+            self.stages[name]["status"] = reason
+
+    async def save(self):
+        """Publish the current state to the shared job store (if any)."""
+        if self.store is not None:
+            await asyncio.to_thread(self.store.save, self.to_dict())
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "stages": {name: dict(info) for name, info in self.stages.items()},
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created,
+            "finishedAt": self.finished,
+        }
+
+
+class _StageProgress:
+    """async with job.stage("name"): marks the stage running -> done/failed with its timing."""
+
+    def __init__(self, job: Job, name: str):
+        self.job = job
+        self.info = job.stages[name]
+
+    async def __aenter__(self):
+        self.started = time.perf_counter()
+        self.info["status"] = "running"
+        await self.job.save()
+        return self.info
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.info["seconds"] = round(time.perf_counter() - self.started, 2)
+        if exc is None:
+            self.info["status"] = "done"
+        else:
+            self.info["status"] = "failed"
+            self.info["error"] = str(exc) or exc_type.__name__
+        await self.job.save()
+        return False
+
+
+class JobQueue:
+    """
+    Bounded pool of asyncio workers. submit() returns immediately with a Job;
+    finished jobs are kept (up to max_jobs, oldest dropped) for status polling.
+    With a store (core/job_store.py) every state change is also published
+    there, so status() works from any worker process.
+    """
+
+    def __init__(self, name: str, workers: int = 2, max_pending: int = 100, max_jobs: int = 500, store=None):
+        self.name = name
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.store = store
+        self._queue = None
+        self._max_pending = max_pending
+        self._jobs = OrderedDict()
+        self._tasks = []
+
+    def _ensure_workers(self):
+        # Created lazily so the queue binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, runner, stage_names: list) -> Job:
+        """runner is `async def runner(job) -> result`."""
+        self._ensure_workers()
+        if self._queue.full():
+            raise QueueFullError(f"{self.name} queue is full")
+        job = Job(stage_names, self.store)
+        # Published before a worker can pick it up, so "queued" never overwrites "running"
+        await job.save()
+        try:
+            self._queue.put_nowait((job, runner))
+        except asyncio.QueueFull:
+            # Filled up while the snapshot was being written
+            job.status = "failed"
+            job.error = f"{self.name} queue is full"
+            job.finished = time.time()
+            await job.save()
+            raise QueueFullError(job.error)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def status(self, job_id: str):
+        """Job state as a dict (from this process, else the shared store), or None."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.load(job_id) if self.store is not None else None
+
+    def stats(self) -> dict:
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "jobs": counts,
+        }
+
+    async def _worker(self):
+        while True:
+            job, runner = await self._queue.get()
+            job.status = "running"
+            await job.save()
+            try:
+                job.result = await runner(job)
+                job.status = "done"
+            except Exception as e:
+                print(f"[{self.name}] Job {job.id} failed: {e}")
+                job.status = "failed"
+                job.error = str(e) or type(e).__name__
+            finally:
+                job.finished = time.time()
+                try:
+                    await job.save()
+                finally:
+                    self._queue.task_done()
@@ -0,0 +1,99 @@
+import json
+import re
+import threading
+from collections import defaultdict
+
+from core.metrics import registry
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?")
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([\]}])")
+
+_decoder = json.JSONDecoder()
+_stats = defaultdict(lambda: {"total": 0, "clean": 0, "recovered": 0, "failed": 0})
+_stats_lock = threading.Lock()
+
+PARSE_OUTCOMES = registry.counter(
+    "llm_json_parse_total", "LLM JSON parse outcomes (clean, recovered, failed) per generator",
+    ("generator", "outcome"))
+
+
+class JSONParseError(ValueError):
+    pass
+
+
+def _record(name: str, outcome: str):
+    with _stats_lock:
+        entry = _stats[name]
+        entry["total"] += 1
+        entry[outcome] += 1
+    PARSE_OUTCOMES.inc(generator=name, outcome=outcome)
+
+
+def _matches(value, expect) -> bool:
+    return expect is None or isinstance(value, expect)
+
+
+def _recover(text: str, expect):
+    """
+    Find the first JSON value of the expected type inside surrounding prose:
+    try a raw decode at every '[' / '{' (in order), also with trailing commas removed.
+    """
+    openers = "[" if expect is list else "{" if expect is dict else "[{"
+    for candidate in (text, TRAILING_COMMA_PATTERN.sub(r"\1", text)):
+        for match in re.finditer("[" + re.escape(openers) + "]", candidate):
+            try:
+                value, _ = _decoder.raw_decode(candidate, match.start())
+            except ValueError:
+                continue
+            if _matches(value, expect):
+                return value
+    raise JSONParseError(f"No JSON {getattr(expect, '__name__', 'value')} found in model output")
+
+
+def _parse(raw: str, expect):
+    """(value, "clean" | "recovered"); raises JSONParseError."""
+    if not isinstance(raw, str):
+        raise JSONParseError("Model output is not text")
+
+    text = FENCE_PATTERN.sub("", raw).strip()
+    try:
+        value = json.loads(text)
+        if _matches(value, expect):
+            return value, "clean"
+    except ValueError:
+        pass
+    return _recover(text, expect), "recovered"
+
+
+def parse_llm_json(raw: str, expect=None, name: str = "default"):
+    """
+    Parse JSON produced by an LLM.
+    Accepts clean JSON, JSON in code fences, or JSON surrounded by prose
+    (and forgives trailing commas). Outcomes are counted per `name` so the
+    parse-failure rate of each generator can be monitored.
+    """
+    try:
+        value, outcome = _parse(raw, expect)
+    except JSONParseError:
+        _record(name, "failed")
+        raise
+    _record(name, outcome)
+    return value
+
+
+def is_llm_json(raw: str, expect=None) -> bool:
+    """True when parse_llm_json would succeed (without counting an outcome)."""
+    try:
+        _parse(raw, expect)
+    except JSONParseError:
+        return False
+    return True
+
+
+def parse_stats() -> dict:
+    """Per-generator parse counts plus failure rate."""
+    with _stats_lock:
+        return {
+            name: {**counts, "failureRate": round(counts["failed"] / counts["total"], 4) if counts["total"] else 0.0}
+            for name, counts in _stats.items()
+        }
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent prompt-hash -> response cache for Gemini calls.
+# SQLite keeps it safe to share between uvicorn workers and restarts.
+CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "llm_cache.sqlite3"),
+)
+DEFAULT_TTL = float(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+DEFAULT_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def prompt_key(prompt: str, *extra) -> str:
+    """Stable cache key for a prompt (plus anything else that changes the answer)."""
+    h = hashlib.sha256(prompt.encode("utf-8"))
+    for part in extra:
+        h.update(b"\0" + str(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+class LLMCache:
+    """
+    Disk-backed response cache with a TTL and a total size cap.
+    Expired rows are ignored on read; once the cap is exceeded the least
+    recently used rows are deleted.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str):
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    db.commit()
+                    return None
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                db.commit()
+                return row[0]
+        except sqlite3.Error as e:
+            print(f"[LLMCache] Read failed: {e}")
+            return None
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, accessed)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, now, now),
+                )
+                self._evict(db, now)
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"[LLMCache] Write failed: {e}")
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if freed >= excess:
+                break
+            stale.append((key,))
+            freed += size
+        db.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self) -> dict:
+        try:
+            with self._lock:
+                count, total = self._db().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        except sqlite3.Error:
+            count, total = 0, 0
+        return {"entries": count, "bytes": total, "maxBytes": self.max_bytes, "ttlSeconds": self.ttl}
+
+
+# Shared instance used by core.gemini_client
+llm_cache = LLMCache()
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import re
+
+from core.gemini_client import requests_available
+
+# Documents longer than this use map-reduce generation in "auto" mode
+# (a short slide deck stays a single call)
+MAP_REDUCE_MIN_CHARS = int(os.getenv("MAP_REDUCE_MIN_CHARS", 30000))
+SECTION_CHARS = int(os.getenv("MAP_REDUCE_SECTION_CHARS", 10000))
+# The section count grows with the document, up to this hard cap...
+MAX_SECTIONS = int(os.getenv("MAP_REDUCE_MAX_SECTIONS", 8))
+# ...and to this share of the requests the rate limiter could send right now,
+# so the map phase runs in one wave and leaves budget for other students
+MAP_BUDGET_SHARE = float(os.getenv("MAP_REDUCE_BUDGET_SHARE", 0.25))
+# Two items whose word sets overlap this much are treated as duplicates
+DUPLICATE_SIMILARITY = 0.8
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def use_map_reduce(mode: str, text: str) -> bool:
+    if mode == "map_reduce":
+        return True
+    if mode == "single":
+        return False
+    return len(text) > MAP_REDUCE_MIN_CHARS
+
+
+def section_limit() -> int:
+    """Most sections one map phase may use with the budget left right now."""
+    return max(1, min(MAX_SECTIONS, int(requests_available() * MAP_BUDGET_SHARE)))
+
+
+def split_sections(text: str, section_chars: int = SECTION_CHARS, max_sections: int = None) -> list:
+    """
+    Cut the document into one section of about section_chars per chunk of
+    text, breaking on paragraph/line boundaries where possible. Beyond
+    max_sections (default: section_limit()) the sections are spread evenly
+    across the whole document, so it is sampled rather than cut off.
+    """
+    if max_sections is None:
+        max_sections = section_limit()
+    text = text.strip()
+    if len(text) <= section_chars:
+        return [text] if text else []
+
+    count = min(max_sections, -(-len(text) // section_chars))
+    stride = len(text) / count
+    sections = []
+    for i in range(count):
+        start = int(i * stride)
+        if i:
+            # Start on a fresh line instead of mid-sentence
+            newline = text.find("\n", start, start + 500)
+            if newline != -1:
+                start = newline + 1
+        end = min(len(text), start + section_chars)
+        if end < len(text):
+            newline = text.rfind("\n", start + section_chars // 2, end)
+            if newline != -1:
+                end = newline
+        sections.append(text[start:end].strip())
+    return [s for s in sections if s]
+
+
+def sampling(text: str, sections: list) -> dict:
+    """How much of the document the map phase saw (reported with the results)."""
+    total = len(text.strip())
+    covered = sum(len(s) for s in sections)
+    coverage = min(1.0, covered / total) if total else 1.0
+    return {
+        "sections": len(sections),
+        "totalChars": total,
+        "sampledChars": covered,
+        "coverage": round(coverage, 3),
+        "sampled": len(sections) < -(-total // SECTION_CHARS),
+    }
+
+
+async def map_sections(sections: list, func, concurrency: int = None) -> list:
+    """
+    Run `await func(index, section)` for every section, all at once by default
+    (split_sections already sized the list to the budget that is free).
+    Returns one result list per section; a failed section yields [].
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency or len(sections)))
+
+    async def run(index, section):
+        async with semaphore:
+            try:
+                return await func(index, section) or []
+            except Exception as e:
+                print(f"[MapReduce] Section {index + 1}/{len(sections)} failed: {e}")
+                return []
+
+    return await asyncio.gather(*(run(i, s) for i, s in enumerate(sections)))
+
+
+def _word_set(text: str) -> frozenset:
+    return frozenset(WORD_PATTERN.findall(text.lower()))
+
+
+def _similar(a: frozenset, b: frozenset) -> bool:
+    if not a or not b:
+        return a == b
+    return len(a & b) / len(a | b) >= DUPLICATE_SIMILARITY
+
+
+def reduce_items(per_section: list, total: int, key) -> list:
+    """
+    Deduplicate candidates (by the text `key(item)` returns) and pick `total`
+    of them round-robin across sections, so every part of the document is covered.
+    """
+    kept_keys = []
+    queues = []
+    for items in per_section:
+        queue = []
+        for item in items:
+            words = _word_set(key(item))
+            if not words or any(_similar(words, seen) for seen in kept_keys):
+                continue
+            kept_keys.append(words)
+            queue.append(item)
+        queues.append(queue)
+
+    selected = []
+    depth = 0
+    while len(selected) < total and any(depth < len(q) for q in queues):
+        for queue in queues:
+            if depth < len(queue) and len(selected) < total:
+                selected.append(queue[depth])
+        depth += 1
+    return selected
+
+
+def per_section_count(total: int, sections: int) -> int:
+    """Ask each section for some spare candidates so dedupe has room to choose."""
+    return max(2, -(-total * 3 // (2 * max(1, sections))))
@@ -0,0 +1,144 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.metrics import registry
+
+# Worker processes used for big PDFs (pypdf is pure Python, so threads don't help)
+PDF_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+# Below this many pages the pool start-up cost outweighs the gain
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_THRESHOLD", 48))
+# Pages handed to a worker at once; small enough that the first pages stream out early
+SHARD_PAGES = int(os.getenv("PDF_SHARD_PAGES", 16))
+
+PDF_PAGES = registry.counter("pdf_pages_extracted_total", "PDF pages extracted", ("mode",))
+PDF_SECONDS_PER_PAGE = registry.histogram(
+    "pdf_extract_seconds_per_page", "Text extraction time per page, averaged over each document", ("mode",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+
+# Forking a process that already runs threads (event loop helpers, to_thread
+# workers, SQLite locks) can deadlock the child, so workers start clean instead
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _open(file_path: str):
+    # pypdf is imported on first use so the API starts without it
+    from pypdf import PdfReader
+    return PdfReader(file_path)
+
+
+def _extract_range(file_path: str, start: int, end: int) -> list:
+    """Runs in a worker process: text of pages [start, end)."""
+    reader = _open(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def page_count(file_path: str) -> int:
+    return len(_open(file_path).pages)
+
+
+def iter_page_texts(file_path: str, workers: int = PDF_WORKERS, threshold: int = PARALLEL_PAGE_THRESHOLD):
+    """
+    Blocking generator of page texts in page order.
+    Large documents are sharded across the process pool; each shard is yielded
+    as soon as it and every shard before it are done.
+    """
+    reader = _open(file_path)
+    total = len(reader.pages)
+
+    if workers <= 1 or total < threshold:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_extract_range, file_path, start, min(start + SHARD_PAGES, total))
+        for start in range(0, total, SHARD_PAGES)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def aiter_page_texts(file_path: str, workers: int = PDF_WORKERS, threshold: int = PARALLEL_PAGE_THRESHOLD):
+    """
+    Async version of iter_page_texts: never blocks the event loop and yields
+    pages in order while later shards are still being extracted.
+    """
+    started = time.perf_counter()
+    total = await asyncio.to_thread(page_count, file_path)
+
+    if workers <= 1 or total < threshold:
+        pages = await asyncio.to_thread(lambda: list(iter_page_texts(file_path, workers=1)))
+        _record_extraction(started, total, "serial")
+        for text in pages:
+            yield text
+        return
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool(workers)
+    futures = [
+        loop.run_in_executor(pool, _extract_range, file_path, start, min(start + SHARD_PAGES, total))
+        for start in range(0, total, SHARD_PAGES)
+    ]
+    try:
+        for future in futures:
+            for text in await future:
+                yield text
+        _record_extraction(started, total, "parallel")
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _record_extraction(started: float, pages: int, mode: str):
+    PDF_PAGES.inc(pages, mode=mode)
+    if pages:
+        PDF_SECONDS_PER_PAGE.observe((time.perf_counter() - started) / pages, mode=mode)
+
+
+def join_pages(pages: list) -> str:
+    """Single join instead of repeated string concatenation."""
+    return "\n".join(text for text in pages if text).strip()
+
+
+def page_offsets(pages: list) -> list:
+    """
+    Character offset in join_pages(pages) where each page starts (empty pages
+    get a zero-length span), so page N is text[offsets[N-1]:offsets[N]].
+    """
+    offsets, position = [], 0
+    for text in pages:
+        offsets.append(position)
+        if text:
+            position += len(text) + 1
+    joined = "\n".join(text for text in pages if text)
+    lead = len(joined) - len(joined.lstrip())
+    length = len(joined.strip())
+    return [min(max(0, offset - lead), length) for offset in offsets]
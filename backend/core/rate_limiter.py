@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` request tokens and refills
+    continuously at `capacity` tokens per `period` seconds.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.refill_rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until at least one token is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.refill_rate
+
+    def drain(self, now: float):
+        self._refill(now)
+        self.tokens = 0.0
+
+
+class RateLimiter:
+    """
+    Tracks the remaining request budget for every (api_key, model) pair.
+    acquire() hands out the pair with the most budget left, or queues the
+    caller until one of the candidates refills.
+    """
+
+    def __init__(self, limits: dict, default_rpm: float, period: float = 60.0):
+        self.limits = limits
+        self.default_rpm = default_rpm
+        self.period = period
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, slot) -> TokenBucket:
+        bucket = self._buckets.get(slot)
+        if bucket is None:
+            _, model = slot
+            bucket = TokenBucket(self.limits.get(model, self.default_rpm), self.period)
+            self._buckets[slot] = bucket
+        return bucket
+
+    def available(self, candidates: list) -> int:
+        """Whole request tokens the candidates hold right now (what could be sent at once)."""
+        now = time.monotonic()
+        with self._lock:
+            return sum(int(self._bucket(slot).available(now)) for slot in candidates)
+
+    def try_acquire(self, candidates: list):
+        """
+        Take a token from the candidate with the most budget left.
+        Returns (slot, 0) on success or (None, seconds_until_next_token).
+        """
+        now = time.monotonic()
+        with self._lock:
+            best = None
+            best_tokens = 0.0
+            wait = None
+            for slot in candidates:
+                bucket = self._bucket(slot)
+                tokens = bucket.available(now)
+                if tokens >= 1 and tokens > best_tokens:
+                    best, best_tokens = slot, tokens
+                slot_wait = bucket.wait_time(now)
+                wait = slot_wait if wait is None else min(wait, slot_wait)
+            if best is not None:
+                self._bucket(best).take(now)
+                return best, 0.0
+            return None, (wait if wait is not None else 0.0)
+
+    async def acquire(self, candidates: list, timeout: float):
+        """Async wait for a slot; returns None if nothing frees up within timeout."""
+        deadline = time.monotonic() + timeout
+        while candidates:
+            slot, wait = self.try_acquire(candidates)
+            if slot is not None:
+                return slot
+            if time.monotonic() + wait > deadline:
+                return None
+            await asyncio.sleep(wait)
+        return None
+
+    def acquire_blocking(self, candidates: list, timeout: float):
+        """Same as acquire() for the synchronous client."""
+        deadline = time.monotonic() + timeout
+        while candidates:
+            slot, wait = self.try_acquire(candidates)
+            if slot is not None:
+                return slot
+            if time.monotonic() + wait > deadline:
+                return None
+            time.sleep(wait)
+        return None
+
+    def penalize(self, slot):
+        """The server said 429: treat this pair as empty until it refills."""
+        with self._lock:
+            self._bucket(slot).drain(time.monotonic())
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                f"{key[-4:]}:{model}": round(bucket.available(now), 2)
+                for (key, model), bucket in self._buckets.items()
+            }
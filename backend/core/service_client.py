@@ -0,0 +1,121 @@
+import asyncio
+import os
+
+# Connections kept open per service between calls
+KEEPALIVE_CONNECTIONS = int(os.getenv("SERVICE_KEEPALIVE_CONNECTIONS", 10))
+CONNECT_TIMEOUT = float(os.getenv("SERVICE_CONNECT_TIMEOUT", 5))
+# Gateway errors worth retrying (the service restarted or is momentarily busy)
+RETRY_STATUSES = {502, 503, 504}
+RETRY_BACKOFF = 0.5
+
+
+class ServiceError(RuntimeError):
+    pass
+
+
+class ServiceClient:
+    """
+    Pooled async HTTP client for one internal microservice.
+    - One keep-alive httpx.AsyncClient per event loop, shared by every call.
+    - At most `concurrency` requests in flight to the service at once.
+    - Every call is retried when the request never reached the service
+      (connect error/timeout, no free pooled connection).
+    - Idempotent calls are also retried on other transport errors (e.g. a
+      read timeout) and 502/503/504; a non-idempotent POST is never re-sent
+      once the service may have started working on it.
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float, concurrency: int = 4, retries: int = 2):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    def _ensure_client(self):
+        # httpx clients and semaphores belong to the loop that created them
+        import httpx  # only needed once a video job actually calls a service
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=min(self.concurrency, KEEPALIVE_CONNECTIONS),
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._client
+
+    async def request(self, method: str, path: str, idempotent: bool = None, timeout: float = None, **kwargs):
+        """Send a request; raises ServiceError on connection failure or a non-2xx answer."""
+        import httpx
+        client = self._ensure_client()
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "PUT", "DELETE")
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT)
+        attempts = 1 + self.retries
+        # Failures that happen before any byte of the request was sent
+        not_sent = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self._semaphore:
+                    response = await client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                error = f"{self.name} unreachable: {type(e).__name__} {e}".strip()
+                if not idempotent and not isinstance(e, not_sent):
+                    raise ServiceError(error)
+            else:
+                if response.is_success:
+                    return response
+                error = f"{self.name} returned HTTP {response.status_code}"
+                if not idempotent or response.status_code not in RETRY_STATUSES:
+                    raise ServiceError(error)
+            if attempt < attempts:
+                print(f"[{self.name}] {error}, retrying ({attempt}/{attempts - 1})")
+                await asyncio.sleep(RETRY_BACKOFF * attempt)
+        raise ServiceError(error)
+
+    async def post_json(self, path: str, payload: dict, idempotent: bool = False, timeout: float = None) -> dict:
+        response = await self.request("POST", path, idempotent=idempotent, timeout=timeout, json=payload)
+        return response.json()
+
+    async def get_json(self, path: str, timeout: float = None) -> dict:
+        response = await self.request("GET", path, timeout=timeout)
+        return response.json()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Asset microservice (members/member3/service.py): TTS + KeyBERT can be slow on long scripts
+asset_service = ServiceClient(
+    "AssetService",
+    os.getenv("ASSET_SERVICE_URL", "http://127.0.0.1:5000"),
+    timeout=float(os.getenv("ASSET_SERVICE_TIMEOUT", 600)),
+    concurrency=int(os.getenv("ASSET_SERVICE_CONCURRENCY", 4)),
+)
+
+# Remotion renderer (video-generation/): rendering is very slow and CPU-heavy
+video_service = ServiceClient(
+    "VideoService",
+    os.getenv("VIDEO_SERVICE_URL", "http://127.0.0.1:3001"),
+    timeout=float(os.getenv("VIDEO_SERVICE_TIMEOUT", 1800)),
+    concurrency=int(os.getenv("VIDEO_SERVICE_CONCURRENCY", 2)),
+)
+
+# Base URL the browser uses to fetch rendered videos (defaults to the renderer itself)
+VIDEO_PUBLIC_URL = os.getenv("VIDEO_PUBLIC_URL", video_service.base_url).rstrip("/")
+
+
+async def close_service_clients():
+    await asyncio.gather(asset_service.close(), video_service.close())
@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from core.document_store import document_store
+from core.file_handler import delete_file
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GC_INTERVAL_SECONDS = float(os.getenv("STORAGE_GC_INTERVAL", 300))
+# Files younger than this are never collected, so a file that is still being
+# written or handed to another service can't disappear underneath it
+MIN_AGE_SECONDS = float(os.getenv("STORAGE_MIN_AGE_SECONDS", 600))
+HASH_CHUNK = 1024 * 1024
+# Only files named by this manager (content hashes, scratch files) are ever collected;
+# anything else placed in the directory by hand is left alone
+MANAGED_NAME = re.compile(r"^[0-9a-f]{32,64}[.\w]*$")
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StorageManager:
+    """
+    Size- and age-capped directory of content-addressed files.
+    - Files are named by the SHA-256 of their bytes, so duplicates are stored once.
+    - Sessions/jobs reference the files they still need; referenced files are never deleted.
+    - A background collector removes unreferenced files older than max_age_seconds,
+      then least-recently-used ones (by mtime, refreshed on reuse) until under max_bytes.
+    owner_alive(owner) lets the collector drop references whose owner has gone away
+    (e.g. an evicted session) without an explicit release().
+    """
+
+    def __init__(self, name: str, root: str, max_bytes: int, max_age_seconds: float,
+                 min_age_seconds: float = MIN_AGE_SECONDS, owner_alive=None):
+        self.name = name
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.min_age_seconds = min_age_seconds
+        self.owner_alive = owner_alive
+        self._refs = {}  # path -> set of owners
+        self._owners = {}  # owner -> set of paths
+        self._lock = threading.Lock()
+        self._collector = None
+        self._last_collection = None
+        self._deleted_files = 0
+        self._freed_bytes = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    # --- writing ---
+    def path_for(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.root, f"{digest}{suffix}")
+
+    def put_bytes(self, data: bytes, suffix: str = "") -> str:
+        """Store data under its content hash and return the path (reused if already stored)."""
+        path = self.path_for(hashlib.sha256(data).hexdigest(), suffix)
+        if os.path.exists(path):
+            self.touch(path)
+            return path
+        tmp_path = self.temp_path(suffix)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+    def temp_path(self, suffix: str = "") -> str:
+        """A scratch path inside the root for writers that stream a file, then adopt() it."""
+        return os.path.join(self.root, f"{uuid.uuid4().hex}{suffix}.tmp")
+
+    def adopt(self, tmp_path: str, suffix: str = "") -> str:
+        """Move a finished scratch file to its content-hash name and return the new path."""
+        path = self.path_for(_hash_file(tmp_path), suffix)
+        if os.path.exists(path):
+            delete_file(tmp_path)
+            self.touch(path)
+        else:
+            os.replace(tmp_path, path)
+        return path
+
+    def touch(self, path: str):
+        """Mark a file as recently used."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    # --- references ---
+    def reference(self, path: str, owner: str):
+        with self._lock:
+            self._refs.setdefault(path, set()).add(owner)
+            self._owners.setdefault(owner, set()).add(path)
+        self.touch(path)
+
+    def release(self, owner: str):
+        """Drop every reference held by owner (the files become collectable)."""
+        with self._lock:
+            self._release(owner)
+
+    @contextmanager
+    def pinned(self, path: str):
+        """Keep path alive for the duration of a with-block."""
+        owner = f"pin:{uuid.uuid4().hex}"
+        self.reference(path, owner)
+        try:
+            yield path
+        finally:
+            self.release(owner)
+
+    def _release(self, owner: str):
+        for path in self._owners.pop(owner, ()):
+            holders = self._refs.get(path)
+            if holders is not None:
+                holders.discard(owner)
+                if not holders:
+                    del self._refs[path]
+
+    def _prune_dead_owners(self):
+        if self.owner_alive is None:
+            return
+        with self._lock:
+            owners = [owner for owner in self._owners if not owner.startswith("pin:")]
+        # owner_alive may hit the document store, so it is asked without holding the lock
+        dead = [owner for owner in owners if not self.owner_alive(owner)]
+        with self._lock:
+            for owner in dead:
+                self._release(owner)
+
+    # --- garbage collection ---
+    def _scan(self) -> list:
+        entries = []
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.is_file() and MANAGED_NAME.match(entry.name):
+                        st = entry.stat()
+                        entries.append((entry.path, st.st_size, st.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def collect(self) -> dict:
+        """
+        One GC pass: age budget first, then LRU down to the byte budget.
+        The directory scan runs unlocked; the lock is only held per file while
+        it is re-checked and deleted, so reference()/pinned() never wait on a pass.
+        """
+        now = time.time()
+        deleted = freed = 0
+        self._prune_dead_owners()
+        entries = sorted(self._scan(), key=lambda e: e[2])  # least recently used first
+        total = sum(size for _, size, _ in entries)
+        for path, size, mtime in entries:
+            age = now - mtime
+            if age < self.min_age_seconds:
+                continue
+            # Leftover scratch files (from a failed write) go regardless of budget
+            if age <= self.max_age_seconds and total <= self.max_bytes and not path.endswith(".tmp"):
+                continue
+            with self._lock:
+                try:
+                    # Referenced or reused (touched) since the scan: keep it
+                    if path in self._refs or now - os.path.getmtime(path) < self.min_age_seconds:
+                        continue
+                except OSError:
+                    continue
+                delete_file(path)
+                removed = not os.path.exists(path)
+            if removed:
+                deleted += 1
+                freed += size
+                total -= size
+        with self._lock:
+            self._last_collection = now
+            self._deleted_files += deleted
+            self._freed_bytes += freed
+        if deleted:
+            print(f"[{self.name}] Collected {deleted} file(s), {freed} bytes")
+        return {"deleted": deleted, "freedBytes": freed}
+
+    async def run_collector(self, interval: float = GC_INTERVAL_SECONDS):
+        while True:
+            try:
+                await asyncio.to_thread(self.collect)
+            except Exception as e:
+                print(f"[{self.name}] Collection failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start_collector(self, interval: float = GC_INTERVAL_SECONDS):
+        """Start the background collector on the running event loop (idempotent)."""
+        if self._collector is None or self._collector.done():
+            self._collector = asyncio.create_task(self.run_collector(interval))
+
+    def stats(self) -> dict:
+        entries = self._scan()
+        with self._lock:
+            referenced = sum(1 for path, _, _ in entries if path in self._refs)
+            stats = {
+                "files": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "referencedFiles": referenced,
+                "owners": len(self._owners),
+                "maxBytes": self.max_bytes,
+                "maxAgeSeconds": self.max_age_seconds,
+                "lastCollection": self._last_collection,
+                "deletedFiles": self._deleted_files,
+                "freedBytes": self._freed_bytes,
+            }
+        usage = shutil.disk_usage(self.root)
+        stats["disk"] = {"total": usage.total, "used": usage.used, "free": usage.free}
+        return stats
+
+
+# Uploaded PDFs (backend/storage/), referenced by the session they belong to
+pdf_storage = StorageManager(
+    "PDFStorage",
+    os.getenv("PDF_STORAGE_DIR", os.path.join(BACKEND_DIR, "storage")),
+    max_bytes=int(os.getenv("PDF_STORAGE_MAX_BYTES", 1024 * 1024 * 1024)),
+    max_age_seconds=float(os.getenv("PDF_STORAGE_MAX_AGE_HOURS", 24)) * 3600,
+    owner_alive=lambda session_id: session_id in document_store,
+)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+
+# On-disk cache of full /upload results, keyed by the SHA-256 of the PDF bytes.
+# A whole class uploading the same lecture only pays for extraction + Gemini once.
+CACHE_DIR = os.getenv(
+    "UPLOAD_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "uploads"),
+)
+DEFAULT_MAX_BYTES = int(os.getenv("UPLOAD_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class UploadCache:
+    """
+    Content-addressed JSON cache for upload results.
+    Entries live in one file per hash; the least recently used files
+    (by modification time, refreshed on every hit) are evicted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, digest: str):
+        """Return the cached result dict for this hash, or None."""
+        path = self._path(digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # mark as recently used
+            return result
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[UploadCache] Dropping unreadable entry {digest}: {e}")
+            self._discard(path)
+            return None
+
+    def put(self, digest: str, result: dict):
+        path = self._path(digest)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)  # atomic, so readers never see half a file
+        except OSError as e:
+            print(f"[UploadCache] Could not write entry {digest}: {e}")
+            self._discard(tmp_path)
+            return
+        self._evict()
+
+    def stats(self) -> dict:
+        files = self._list_entries()
+        return {
+            "entries": len(files),
+            "bytes": sum(size for _, size, _ in files),
+            "maxBytes": self.max_bytes,
+        }
+
+    def _list_entries(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(".json"):
+                        st = entry.stat()
+                        entries.append((entry.path, st.st_size, st.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = self._list_entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            # Oldest first
+            for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                if total <= self.max_bytes:
+                    break
+                self._discard(path)
+                total -= size
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Shared instance used by the API
+upload_cache = UploadCache()
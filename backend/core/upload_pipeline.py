@@ -0,0 +1,208 @@
+import asyncio
+import os
+import time
+
+from core.gemini_client import call_gemini_async
+from core.metrics import registry
+from core.pdf_extract import aiter_page_texts, join_pages, page_offsets
+from members.member1.retrieval import index_document
+from members.member5.extractor import StreamingExtractor
+from members.member5.glossary import build_glossary
+from members.member5.processor import kept_lines, cleaned_offset
+from members.member2.study_pack import generate_study_pack
+
+# Per-stage timeouts in seconds (the LLM stages dominate)
+STAGE_TIMEOUTS = {
+    "pages": float(os.getenv("UPLOAD_TEXT_TIMEOUT", 120)),
+    "clean": 15.0,
+    "text": 15.0,
+    "formulas": 15.0,
+    "citations": 15.0,
+    "index": 30.0,
+    "glossary": float(os.getenv("UPLOAD_LLM_TIMEOUT", 90)),
+    "summary": float(os.getenv("UPLOAD_LLM_TIMEOUT", 90)),
+    "study_pack": float(os.getenv("UPLOAD_LLM_TIMEOUT", 90)) * 1.5,
+}
+
+# If header/footer cleaning keeps less than this share of the text, the raw pages are used
+CLEAN_MIN_KEPT = 0.5
+
+STAGE_LATENCY = registry.histogram(
+    "upload_stage_duration_seconds", "Time spent in each upload pipeline stage", ("stage", "outcome"))
+
+
+class Stage:
+    """One step of the pipeline: an async function of the results it depends on."""
+
+    def __init__(self, name: str, func, deps=(), timeout: float = 60.0):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+
+
+async def run_pipeline(stages: list) -> tuple:
+    """
+    Run stages as soon as their dependencies finish, independent ones concurrently.
+    Returns (results, errors). A failed or timed-out stage only takes down the
+    stages that depend on it; everything else still finishes.
+    """
+    results, errors = {}, {}
+    done = {name: asyncio.Event() for name in (s.name for s in stages)}
+
+    async def run(stage: Stage):
+        try:
+            for dep in stage.deps:
+                await done[dep].wait()
+            missing = [dep for dep in stage.deps if dep not in results]
+            if missing:
+                errors[stage.name] = f"skipped (needs {', '.join(missing)})"
+                return
+            started = time.perf_counter()
+            args = [results[dep] for dep in stage.deps]
+            results[stage.name] = await asyncio.wait_for(stage.func(*args), timeout=stage.timeout)
+            elapsed = time.perf_counter() - started
+            STAGE_LATENCY.observe(elapsed, stage=stage.name, outcome="ok")
+            print(f"[Pipeline] {stage.name} finished in {elapsed:.2f}s")
+        except asyncio.TimeoutError:
+            errors[stage.name] = f"timed out after {stage.timeout:g}s"
+            STAGE_LATENCY.observe(stage.timeout, stage=stage.name, outcome="timeout")
+            print(f"[Pipeline] {stage.name} {errors[stage.name]}")
+        except Exception as e:
+            errors[stage.name] = str(e) or type(e).__name__
+            print(f"[Pipeline] {stage.name} failed: {errors[stage.name]}")
+        finally:
+            done[stage.name].set()
+
+    await asyncio.gather(*(run(stage) for stage in stages))
+    return results, errors
+
+
+# ==========================================
+# UPLOAD STAGES
+# ==========================================
+async def summarize(pdf_text: str) -> str:
+    summary_prompt = f"""Summarize the following document in a clear, structured way.
+Use bullet points for key topics. Keep it concise (under 200 words).
+
+DOCUMENT TEXT:
+{pdf_text[:5000]}"""
+    summary = (await call_gemini_async(summary_prompt)).strip()
+    if not summary or summary.startswith("AI Error"):
+        raise RuntimeError(summary or "empty summary")
+    return summary
+
+
+def upload_stages(file_path: str, study_pack: bool = False) -> list:
+    # Formulas/citations are scanned page by page while the PDF is still being
+    # parsed; once cleaning is done their offsets are moved into the cleaned
+    # pages, so they point into the same page text that is stored (see "offsets")
+    extractor = StreamingExtractor()
+    parsed = asyncio.Queue()
+    kept = []  # per page: indexes of the lines cleaning kept
+
+    async def pages_stage():
+        pages = []
+        try:
+            async for text in aiter_page_texts(file_path):
+                pages.append(text)
+                parsed.put_nowait(text)
+        finally:
+            parsed.put_nowait(None)
+        return pages
+
+    async def scan_stage():
+        scanned = []
+        while (text := await parsed.get()) is not None:
+            # Line endings normalized as in the cleaned pages, so offsets only shift by removed lines
+            scanned.append(extractor.scan("\n".join((text or "").splitlines())))
+        return scanned
+
+    async def clean_stage(pages):
+        split_pages = [(text or "").splitlines() for text in pages]
+        everything = [list(range(len(lines))) for lines in split_pages]
+        try:
+            lines = await asyncio.to_thread(kept_lines, pages)
+        except Exception as e:
+            # Boilerplate removal is an optimization; never lose the text over it
+            print(f"[Pipeline] header/footer cleaning failed, using raw pages: {e}")
+            lines = everything
+        raw_chars = sum(len("\n".join(page_lines)) for page_lines in split_pages)
+        kept_chars = sum(sum(len(page_lines[i]) + 1 for i in page_kept) - 1
+                         for page_lines, page_kept in zip(split_pages, lines) if page_kept)
+        if kept_chars < raw_chars * CLEAN_MIN_KEPT:
+            # Real headers and footers are a small part of a page; this removed the content
+            print(f"[Pipeline] header/footer cleaning kept {kept_chars}/{raw_chars} chars, using raw pages")
+            lines = everything
+        kept.extend(lines)
+        return [
+            "\n".join(page_lines[i] for i in page_kept)
+            for page_lines, page_kept in zip(split_pages, lines)
+        ]
+
+    async def text_stage(pages):
+        pdf_text = join_pages(pages)
+        if not pdf_text:
+            raise ValueError("no extractable text")
+        return pdf_text
+
+    async def offsets_stage(pages):
+        return page_offsets(pages)
+
+    async def matches_stage(pages, cleaned, scanned):
+        for number, (text, found) in enumerate(zip(pages, scanned), start=1):
+            locate = cleaned_offset((text or "").splitlines(), kept[number - 1])
+            for kind, match, offset in found:
+                offset = locate(offset, len(match))
+                if offset is not None:  # None: inside a removed header/footer line
+                    extractor.add(kind, match, number, offset)
+        # Which kinds hit the per-kind cap (the lists are then only the first matches)
+        return dict(extractor.truncated)
+
+    async def formulas_stage(truncated):
+        return extractor.matches("formulas")
+
+    async def citations_stage(truncated):
+        return extractor.matches("citations")
+
+    stages = [
+        Stage("pages", pages_stage, timeout=STAGE_TIMEOUTS["pages"]),
+        Stage("clean", clean_stage, deps=["pages"], timeout=STAGE_TIMEOUTS["clean"]),
+        Stage("text", text_stage, deps=["clean"], timeout=STAGE_TIMEOUTS["text"]),
+        Stage("offsets", offsets_stage, deps=["clean"], timeout=STAGE_TIMEOUTS["text"]),
+        Stage("scan", scan_stage, timeout=STAGE_TIMEOUTS["pages"]),
+        Stage("matches", matches_stage, deps=["pages", "clean", "scan"], timeout=STAGE_TIMEOUTS["formulas"]),
+        Stage("formulas", formulas_stage, deps=["matches"], timeout=STAGE_TIMEOUTS["formulas"]),
+        Stage("citations", citations_stage, deps=["matches"], timeout=STAGE_TIMEOUTS["citations"]),
+        Stage("index", index_document, deps=["text"], timeout=STAGE_TIMEOUTS["index"]),
+    ]
+
+    if not study_pack:
+        return stages + [
+            Stage("glossary", build_glossary, deps=["text"], timeout=STAGE_TIMEOUTS["glossary"]),
+            Stage("summary", summarize, deps=["text"], timeout=STAGE_TIMEOUTS["summary"]),
+        ]
+
+    # Combined mode: one LLM call, then each artifact is picked out of the pack
+    def pick(key):
+        async def pick_stage(pack):
+            if not pack.get(key):
+                raise ValueError(f"study pack has no {key}")
+            return pack[key]
+        return pick_stage
+
+    return stages + [
+        Stage("study_pack", generate_study_pack, deps=["text"], timeout=STAGE_TIMEOUTS["study_pack"]),
+    ] + [
+        Stage(key, pick(key), deps=["study_pack"], timeout=1.0)
+        for key in ("summary", "glossary", "quiz", "flashcards")
+    ]
+
+
+async def analyze_upload(file_path: str, study_pack: bool = False) -> tuple:
+    """
+    Run the full upload analysis for a stored PDF. Returns (results, errors).
+    study_pack=True replaces the separate glossary/summary calls with one
+    combined call that also produces the quiz and flashcards.
+    """
+    return await run_pipeline(upload_stages(file_path, study_pack))
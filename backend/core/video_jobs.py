@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import os
+
+from core.gemini_client import call_gemini_async
+from core.jobs import JobQueue
+from core.job_store import job_store
+from core.service_client import asset_service, video_service, VIDEO_PUBLIC_URL
+from members.member3.script_templates import TEACHING_SCRIPT_TEMPLATE
+from members.member5.analytics import analyze_document
+
+VIDEO_STAGES = ["script", "assets", "render"]
+# Renders are CPU-heavy on the Remotion side, so only a few run at once
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", 2))
+# How often a job waiting for another worker's render of the same script checks back
+RENDER_POLL_SECONDS = 2.0
+# A render claim older than this is assumed abandoned (its worker died) and taken over
+RENDER_CLAIM_SECONDS = float(os.getenv("VIDEO_SERVICE_TIMEOUT", 1800)) + 600
+
+# Job state lives in the shared job store, so /video-status works from any worker
+video_queue = JobQueue("VideoQueue", workers=VIDEO_WORKERS, store=job_store)
+
+
+def script_hash(script: str) -> str:
+    return hashlib.sha256(script.encode("utf-8")).hexdigest()
+
+
+def _render_key(digest: str) -> str:
+    return f"video:{digest}"
+
+
+async def fetch_assets(script: str, job_id: str = "") -> dict:
+    """Get Audio and Images from the asset microservice (the audio stays referenced by job_id)."""
+    # Not idempotent: a re-send after a read timeout would start a second long TTS run.
+    # It is still retried when the connection could not be made at all.
+    return await asset_service.post_json("/generate-video-assets", {"text": script, "jobId": job_id})
+
+
+async def release_assets(job_id: str):
+    """Let the asset service collect this job's audio once the renderer is done with it."""
+    try:
+        await asset_service.post_json("/media/release", {"jobId": job_id}, idempotent=True)
+    except Exception as e:
+        print(f"Could not release assets of job {job_id}: {e}")
+
+
+async def render_video(node_payload: dict) -> str:
+    """Send everything (including audio + duration) to the Remotion renderer."""
+    node_data = await video_service.post_json("/generate-video", node_payload)
+    if not node_data.get("success"):
+        raise RuntimeError(node_data.get("error") or "renderer reported failure")
+    return f"{VIDEO_PUBLIC_URL}{node_data['videoUrl']}"
+
+
+async def _produce(job, script: str, duration: int) -> dict:
+    audio_url = ""
+    audio_duration = 0.0
+    images = []
+    try:
+        async with job.stage("assets"):
+            print(f"Fetching Audio & Images from {asset_service.base_url}...")
+            assets_data = await fetch_assets(script, job.id)
+            audio_url = assets_data.get("audioUrl", "")
+            audio_duration = assets_data.get("audioDuration", 0.0)
+            images = assets_data.get("images", [])
+            print(f"Got audio: {audio_url} (duration: {audio_duration:.2f}s)")
+    except Exception as e:
+        # The renderer can still make a silent video without the assets
+        print(f"Asset service failed: {e}")
+
+    video_url = ""
+    try:
+        async with job.stage("render"):
+            print(f"Rendering MP4 on {video_service.base_url}...")
+            video_url = await render_video({
+                "script": script,
+                "title": "Document Summary",
+                "readingLevel": 5,
+                "images": images,
+                "audioUrl": audio_url,
+                "audioDuration": audio_duration
+            })
+    except Exception as e:
+        print(f"Video renderer failed: {e}")
+    finally:
+        if audio_url:
+            await release_assets(job.id)
+
+    return {"videoUrl": video_url, "script": script, "duration": duration}
+
+
+async def run_video_job(job, pdf_text: str, use_cache: bool = True) -> dict:
+    """script -> assets -> render, reusing any finished video for the same script."""
+    async with job.stage("script"):
+        prompt = TEACHING_SCRIPT_TEMPLATE.format(text=pdf_text[:5000])
+        script = (await call_gemini_async(prompt, use_cache=use_cache)).strip()
+        if script.startswith("AI Error"):
+            raise ValueError(script)
+    # Tokenizes the whole document, so it runs off the event loop
+    analysis = await asyncio.to_thread(analyze_document, pdf_text, include_matches=False)
+    duration = analysis["recommended_duration_seconds"]
+    key = _render_key(script_hash(script))
+
+    # Finished renders and renders in progress are shared by every worker process:
+    # identical scripts reuse the video, concurrent duplicates wait instead of re-rendering
+    while True:
+        finished = await asyncio.to_thread(job_store.result, key) if use_cache else None
+        if finished is not None:
+            job.skip("assets", "render", reason="reused")
+            return {**finished, "duration": duration}
+        if await asyncio.to_thread(job_store.claim, key, RENDER_CLAIM_SECONDS, not use_cache):
+            break
+        # Same script is already being rendered by another job: wait for it
+        if job.stages["render"]["status"] != "waiting":
+            job.skip("assets", "render", reason="waiting")
+            await job.save()
+        await asyncio.sleep(RENDER_POLL_SECONDS)
+        # Once that render is done, reuse it even on a regenerate request
+        use_cache = True
+
+    finished = False
+    try:
+        result = await _produce(job, script, duration)
+        if result["videoUrl"]:
+            await asyncio.to_thread(job_store.finish, key, result)
+            finished = True
+        return result
+    finally:
+        if not finished:
+            await asyncio.to_thread(job_store.release, key)
+
+
+async def submit_video_job(pdf_text: str, use_cache: bool = True):
+    return await video_queue.submit(
+        lambda job: run_video_job(job, pdf_text, use_cache),
+        VIDEO_STAGES,
+    )
@@ -0,0 +1,72 @@
+import asyncio
+import importlib
+import os
+import time
+from collections import OrderedDict
+
+# WARMUP=0 skips the background warm-up: everything then loads on first use
+WARMUP_ENABLED = os.getenv("WARMUP", "1") == "1"
+
+
+class WarmUp:
+    """
+    Loads heavy dependencies in the background after start-up, so the port
+    opens (and health checks answer) immediately while the first real request
+    still finds SDKs imported and clients created.
+    Steps run one after another in a worker thread; a failed step is only
+    reported, since the code that needs it will load it again on first use.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.steps = OrderedDict()
+        self._state = OrderedDict()
+        self._task = None
+        self.started = None
+        self.finished = None
+
+    def step(self, name: str, fn):
+        """Register a warm-up step: a coroutine function, or a plain function run in a worker thread."""
+        self.steps[name] = fn
+        self._state[name] = {"status": "pending", "seconds": None, "error": None}
+
+    def import_step(self, name: str, *modules):
+        self.step(name, lambda: [importlib.import_module(m) for m in modules])
+
+    def start(self):
+        """Schedule the warm-up on the running loop (no-op if disabled or already started)."""
+        if self._task is None and WARMUP_ENABLED:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def run(self):
+        self.started = time.time()
+        for name, fn in self.steps.items():
+            state = self._state[name]
+            state["status"] = "running"
+            began = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    await fn()
+                else:
+                    await asyncio.to_thread(fn)
+                state["status"] = "done"
+            except Exception as e:
+                state["status"] = "failed"
+                state["error"] = str(e)
+                print(f"[{self.name}] Warm-up step '{name}' failed: {e}")
+            state["seconds"] = round(time.perf_counter() - began, 3)
+        self.finished = time.time()
+        print(f"[{self.name}] Warm-up finished in {self.finished - self.started:.2f}s")
+
+    @property
+    def ready(self) -> bool:
+        # Without a warm-up there is nothing to wait for
+        return not WARMUP_ENABLED or self.finished is not None
+
+    def status(self) -> dict:
+        return {
+            "enabled": WARMUP_ENABLED,
+            "ready": self.ready,
+            "steps": {name: dict(state) for name, state in self._state.items()},
+        }
@@ -1,23 +1,51 @@
-import shutil
+import asyncio
 import os
 import sys
 import json
-from pypdf import PdfReader
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import requests
-from members.member3.script_templates import TEACHING_SCRIPT_TEMPLATE
 
 # --- ABSOLUTE IMPORTS (Fixes "Module Not Found") ---
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from core.gemini_client import call_gemini
-from members.member1.interactive_service import get_chat_response, eli5_answer
-from members.member2.quiz_format import generate_quiz
-from members.member5.extractor import extract_formulas, extract_citations
-from members.member5.glossary import build_glossary
-from members.member5.pacing import calculate_duration
+from core.document_store import document_store
+from core.upload_cache import upload_cache, hash_bytes
+from core.upload_pipeline import analyze_upload
+from core.map_reduce import use_map_reduce
+from core.json_parser import parse_stats
+from core.jobs import QueueFullError
+from core.video_jobs import submit_video_job, video_queue
+from core.service_client import close_service_clients
+from core.storage import pdf_storage
+from core.metrics import install_http_metrics
+from core.warmup import WarmUp
+from core.gemini_client import warm_up_clients
+from core.context_cache import context_cache
+from members.member1.interactive_service import (
+    get_chat_response,
+    eli5_answer,
+    stream_chat_response,
+    stream_eli5_answer,
+    register_document,
+    document_context,
+    remember_turn,
+)
+from members.member1.retrieval import index_document
+from members.member5.glossary import GLOSSARY_UNAVAILABLE
+from members.member2.quiz_format import (
+    generate_quiz,
+    generate_quiz_map_reduce,
+    normalize_quiz_question,
+    parse_json_list,
+)
+from members.member2.study_pack import generate_study_pack
+from members.member2.flashcards import (
+    generate_flashcards,
+    generate_flashcards_map_reduce,
+    validate_flashcards,
+)
 
 app = FastAPI()
 
@@ -30,88 +58,205 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- GLOBAL STORAGE ---
-CURRENT_PDF_TEXT = ""
+# --- METRICS (GET /metrics, Prometheus text format) ---
+install_http_metrics(app)
+
+@app.on_event("startup")
+async def start_storage_collector():
+    pdf_storage.start_collector()
+
+# --- WARM-UP (heavy SDKs load in the background; GET / reports readiness) ---
+startup_warmup = WarmUp("AI Study Hub")
+startup_warmup.step("gemini", warm_up_clients)
+startup_warmup.import_step("pdf", "pypdf")
+startup_warmup.import_step("sentiment", "textblob")
+startup_warmup.import_step("services", "httpx")
+
+@app.on_event("startup")
+async def start_warmup():
+    startup_warmup.start()
+
+@app.on_event("shutdown")
+async def close_http_pools():
+    await close_service_clients()
+
+# --- SESSION STORAGE ---
+# Each upload gets its own session ID (see core/document_store.py)
 
 class ChatRequest(BaseModel):
     question: str
+    sessionId: str = ""
+
+class SearchRequest(BaseModel):
+    query: str
+    sessionId: str = ""
+    limit: int = 5
+
+class SessionRequest(BaseModel):
+    sessionId: str = ""
+    regenerate: bool = False  # bypass the LLM response cache for a fresh result
+    mode: str = "auto"  # quiz/flashcards: "single", "map_reduce" or "auto" (map-reduce for long documents)
+
+def is_eli5_request(question: str) -> bool:
+    """Check for ELI5 trigger keywords"""
+    user_q = question.lower()
+    eli5_triggers = ["like i'm 5", "eli5", "explain it simply", "simplify this"]
+    return any(trigger in user_q for trigger in eli5_triggers)
 
 @app.get("/")
 def health_check():
-    return {"status": "AI Study Hub is Running"}
+    return {"status": "AI Study Hub is Running", "ready": startup_warmup.ready, "warmup": startup_warmup.status()}
+
+@app.get("/stats/parsing")
+def parsing_stats():
+    """Parse outcomes of LLM JSON output per generator (quiz, flashcards, glossary, ...)"""
+    return parse_stats()
+
+@app.get("/stats/context-cache")
+def context_cache_stats():
+    """Documents registered for cached chat context and their live Gemini caches"""
+    return context_cache.stats()
+
+@app.get("/stats/storage")
+def storage_stats():
+    """Disk usage of stored PDFs and what the collector has freed so far"""
+    return {"pdfs": pdf_storage.stats()}
 
 # --- UPLOAD ENDPOINT ---
 @app.post("/upload")
-async def upload_pdf(file: UploadFile = File(...)):
-    global CURRENT_PDF_TEXT
+async def upload_pdf(file: UploadFile = File(...), studyPack: bool = False):
     try:
-        storage_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "storage")
-        os.makedirs(storage_dir, exist_ok=True)
-        file_path = os.path.join(storage_dir, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        reader = PdfReader(file_path)
-        extracted_text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                extracted_text += page_text + "\n"
-
-        CURRENT_PDF_TEXT = extracted_text.strip()
-        print(f"Success! Extracted {len(CURRENT_PDF_TEXT)} chars from {file.filename}")
-
-        if not CURRENT_PDF_TEXT:
+        contents = await file.read()
+        pdf_hash = hash_bytes(contents)
+        # A study-pack upload also caches quiz + flashcards, so it gets its own entry
+        cache_key = f"{pdf_hash}-studypack" if studyPack else pdf_hash
+
+        # --- Repeat upload of the same PDF: serve the cached analysis ---
+        # File read + JSON of the whole text (and put's eviction scan) run off the event loop
+        cached = await asyncio.to_thread(upload_cache.get, cache_key)
+        if cached:
+            print(f"Upload cache hit for {file.filename} ({pdf_hash[:12]})")
+            index = await index_document(cached["text"])
+            study_data = {
+                "quiz": cached.get("quiz", []),
+                "flashcards": cached.get("flashcards", []),
+                "glossary": cached["glossary"],
+                "formulas": cached["formulas"],
+                "formulaSources": cached.get("formulaSources", []),
+                "citations": cached["citations"],
+                "matchesTruncated": cached.get("matchesTruncated", {"formulas": False, "citations": False}),
+            }
+            session_id = await asyncio.to_thread(
+                document_store.create,
+                cached["text"], filename=file.filename, index=index,
+                pageOffsets=cached.get("pageOffsets"),
+                analysis={"summary": cached["summary"], "studyData": study_data},
+                contextId=register_document(cached["text"]), history=[],
+            )
+            return {
+                "sessionId": session_id,
+                "filename": file.filename,
+                "summary": cached["summary"],
+                "studyData": study_data,
+            }
+
+        # Stored under its content hash; pinned so the collector leaves it alone mid-analysis
+        file_path = await asyncio.to_thread(pdf_storage.put_bytes, contents, ".pdf")
+
+        # --- Run the analysis stages (parse -> regex / index / glossary / summary) ---
+        with pdf_storage.pinned(file_path):
+            results, errors = await analyze_upload(file_path, study_pack=studyPack)
+
+        pdf_text = results.get("text", "")
+        if not pdf_text:
+            if "pages" in errors:
+                raise HTTPException(status_code=500, detail=f"PDF parsing failed: {errors['pages']}")
             raise HTTPException(
                 status_code=400,
                 detail="Could not extract text from this PDF. It may be a scanned/image-based document."
             )
-
-        # --- Run member5 analysis (no AI needed) ---
-        formulas = extract_formulas(CURRENT_PDF_TEXT)
-        citations_raw = extract_citations(CURRENT_PDF_TEXT)
-        
-        # Directly assign the output since it is already in the correct list format
-        glossary_list = build_glossary(CURRENT_PDF_TEXT)
+        print(f"Success! Extracted {len(pdf_text)} chars from {file.filename}")
+
+        # Each match is {"text", "page", "offset"} so the frontend can jump to the source
+        formula_matches = results.get("formulas", [])
+        # Match lists stop at StreamingExtractor.max_matches per kind; tell the client when that happened
+        matches_truncated = results.get("matches", {"formulas": False, "citations": False})
+        citation_matches = results.get("citations", [])
+        formulas = [m["text"] for m in formula_matches]
+        formula_sources = [{"page": m["page"], "offset": m["offset"]} for m in formula_matches]
+        glossary_list = results.get("glossary", [])
+        if "glossary" in errors:
+            # Friendly placeholder for this response only; errors keep it out of the upload cache
+            glossary_list = [dict(item) for item in GLOSSARY_UNAVAILABLE]
+        quiz = results.get("quiz", [])
+        flashcards = results.get("flashcards", [])
+        index = results.get("index")
+        page_offsets = results.get("offsets")
 
         citations_list = [
-            {"title": c, "link": f"https://scholar.google.com/scholar?q={c.replace(' ', '+')}"}
-            for c in citations_raw
+            {
+                "title": c["text"],
+                "link": f"https://scholar.google.com/scholar?q={c['text'].replace(' ', '+')}",
+                "page": c["page"],
+                "offset": c["offset"],
+            }
+            for c in citation_matches
         ]
 
-        # --- Generate AI summary ---
-        summary = ""
-        try:
-            summary_prompt = f"""Summarize the following document in a clear, structured way.
-Use bullet points for key topics. Keep it concise (under 200 words).
-
-DOCUMENT TEXT:
-{CURRENT_PDF_TEXT[:5000]}"""
-            summary = call_gemini(summary_prompt).strip()
-        except Exception as e:
-            print(f"Summary generation error: {e}")
-
-        if not summary or summary.startswith("AI Error"):
-            word_count = len(CURRENT_PDF_TEXT.split())
+        summary = results.get("summary", "")
+        if not summary:
+            word_count = len(pdf_text.split())
             summary = (
                 f"Document **{file.filename}** uploaded successfully.\n\n"
                 f"- **Word count:** {word_count}\n"
                 f"- **Formulas found:** {len(formulas)}\n"
-                f"- **Citations found:** {len(citations_raw)}\n"
+                f"- **Citations found:** {len(citations_list)}\n"
                 f"- **Glossary terms:** {len(glossary_list)}\n\n"
                 f"You can now use **Chat**, **Quiz**, **Flashcards**, and other study tools."
             )
 
-        return {
-            "filename": file.filename,
-            "summary": summary,
-            "studyData": {
-                "quiz": [],
-                "flashcards": [],
+        # Only cache complete results, so a transient outage isn't served to everyone
+        if not errors:
+            await asyncio.to_thread(upload_cache.put, cache_key, {
+                "text": pdf_text,
+                "summary": summary,
                 "glossary": glossary_list,
                 "formulas": formulas,
+                "formulaSources": formula_sources,
                 "citations": citations_list,
-            }
+                "quiz": quiz,
+                "flashcards": flashcards,
+                "pageOffsets": page_offsets,
+                "matchesTruncated": matches_truncated,
+            })
+
+        if index is None:
+            index = await index_document(pdf_text)
+        study_data = {
+            "quiz": quiz,
+            "flashcards": flashcards,
+            "glossary": glossary_list,
+            "formulas": formulas,
+            "formulaSources": formula_sources,
+            "citations": citations_list,
+            "matchesTruncated": matches_truncated,
+        }
+        # The document is registered once for chat; later turns only send the conversation delta
+        session_id = await asyncio.to_thread(
+            document_store.create,
+            pdf_text, filename=file.filename, index=index,
+            pageOffsets=page_offsets,
+            analysis={"summary": summary, "studyData": study_data},
+            contextId=register_document(pdf_text), history=[],
+        )
+        pdf_storage.reference(file_path, session_id)
+
+        return {
+            "sessionId": session_id,
+            "filename": file.filename,
+            "summary": summary,
+            "studyData": study_data,
+            "stageErrors": errors,
         }
     except HTTPException:
         raise
@@ -121,81 +266,127 @@ DOCUMENT TEXT:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+async def session_index(session_id: str, document: dict):
+    """
+    The session's chat chunk index. With DOCUMENT_STORE=sqlite another worker
+    may have handled the upload, so the index is rebuilt here and kept locally.
+    """
+    index = document.get("index")
+    if index is None:
+        index = await index_document(document["text"])
+        await asyncio.to_thread(document_store.update, session_id, index=index)
+    return index
+
+# --- SEARCH ENDPOINT (pages of the uploaded document matching a query) ---
+@app.post("/search")
+async def search_endpoint(request: SearchRequest):
+    if not await asyncio.to_thread(document_store.__contains__, request.sessionId):
+        raise HTTPException(status_code=400, detail="No PDF uploaded")
+    limit = max(1, min(request.limit, 20))
+    return {"results": await asyncio.to_thread(document_store.search, request.sessionId, request.query, limit)}
+
 # --- CHAT ENDPOINT ---
 @app.post("/chat")
 async def chat_endpoint(request: ChatRequest):
-    if not CURRENT_PDF_TEXT:
+    document = await asyncio.to_thread(document_store.get, request.sessionId)
+    if not document:
         return {"answer": "Please upload a document first."}
+    pdf_text = document["text"]
+    index = await session_index(request.sessionId, document)
+    history = document.get("history", [])
+    context = document_context(document)
 
-    user_q = request.question.lower()
-
-    # Check for ELI5 trigger keywords
-    eli5_triggers = ["like i'm 5", "eli5", "explain it simply", "simplify this"]
-    is_eli5 = any(trigger in user_q for trigger in eli5_triggers)
-
-    if is_eli5:
+    if is_eli5_request(request.question):
         # First get a normal answer, then simplify it
-        normal_response = get_chat_response(CURRENT_PDF_TEXT, request.question)
-        response = eli5_answer(normal_response)
+        normal_response = await get_chat_response(pdf_text, request.question, index, history, context)
+        response = await eli5_answer(normal_response)
     else:
-        response = get_chat_response(CURRENT_PDF_TEXT, request.question)
+        response = await get_chat_response(pdf_text, request.question, index, history, context)
 
+    # Appended atomically: a concurrent turn on the same session must not be overwritten
+    await asyncio.to_thread(
+        document_store.modify, request.sessionId, "history",
+        lambda h: remember_turn(h, request.question, response), [])
     return {"answer": response}
 
 
-def normalize_quiz_question(q: dict) -> dict:
-    """Normalize a quiz question to match frontend's expected format."""
-    question_text = q.get("question", "")
-    options = q.get("options", [])
-    explanation = q.get("explanation", "")
-
-    # Handle correctAnswer (index) vs answer (text)
-    if "correctAnswer" in q:
-        correct_answer = q["correctAnswer"]
-        if isinstance(correct_answer, str):
-            try:
-                correct_answer = options.index(correct_answer)
-            except ValueError:
-                correct_answer = 0
-    elif "answer" in q:
-        answer_text = q["answer"]
+def sse_event(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+# --- STREAMING CHAT ENDPOINT (Server-Sent Events) ---
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Streams the answer as SSE events:
+      {"type": "token", "stage": "answer" | "draft", "text": "..."}
+      {"type": "done", "answer": "..."}
+    In ELI5 mode the normal answer is streamed as the "draft" stage and the
+    simplification starts as soon as that draft is complete.
+    """
+    document = await asyncio.to_thread(document_store.get, request.sessionId)
+
+    async def events():
+        if not document:
+            yield sse_event({"type": "done", "answer": "Please upload a document first."})
+            return
+
+        pdf_text = document["text"]
+        index = await session_index(request.sessionId, document)
+        history = document.get("history", [])
+        context = document_context(document)
         try:
-            correct_answer = options.index(answer_text)
-        except ValueError:
-            correct_answer = 0
-    else:
-        correct_answer = 0
+            if is_eli5_request(request.question):
+                draft = []
+                async for piece in stream_chat_response(pdf_text, request.question, index, history, context):
+                    draft.append(piece)
+                    yield sse_event({"type": "token", "stage": "draft", "text": piece})
+                answer = []
+                async for piece in stream_eli5_answer("".join(draft)):
+                    answer.append(piece)
+                    yield sse_event({"type": "token", "stage": "answer", "text": piece})
+            else:
+                answer = []
+                async for piece in stream_chat_response(pdf_text, request.question, index, history, context):
+                    answer.append(piece)
+                    yield sse_event({"type": "token", "stage": "answer", "text": piece})
+            answer = "".join(answer).strip()
+            await asyncio.to_thread(
+                document_store.modify, request.sessionId, "history",
+                lambda h: remember_turn(h, request.question, answer), [])
+            yield sse_event({"type": "done", "answer": answer})
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            yield sse_event({"type": "done", "answer": f"Error connecting to Gemini: {str(e)}"})
 
-    return {
-        "question": question_text,
-        "options": options,
-        "correctAnswer": int(correct_answer),
-        "explanation": explanation,
-    }
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # --- QUIZ ENDPOINT (With Crash Protection) ---
 @app.post("/generate-quiz")
-async def quiz_endpoint():
-    if not CURRENT_PDF_TEXT:
+async def quiz_endpoint(request: SessionRequest):
+    pdf_text = await asyncio.to_thread(document_store.get_text, request.sessionId)
+    if not pdf_text:
         raise HTTPException(status_code=400, detail="No PDF uploaded")
 
     try:
-        quiz_json = generate_quiz(CURRENT_PDF_TEXT)
-        # Clean Markdown code fences
-        clean_json = quiz_json.replace("```json", "").replace("```", "").strip()
-        questions = json.loads(clean_json)
-
-        # Handle both single object and array
-        if isinstance(questions, dict):
-            questions = [questions]
-
-        if not isinstance(questions, list) or not questions:
+        coverage = None
+        if use_map_reduce(request.mode, pdf_text):
+            normalized, coverage = await generate_quiz_map_reduce(pdf_text, use_cache=not request.regenerate)
+        else:
+            quiz_json = await generate_quiz(pdf_text, use_cache=not request.regenerate)
+            # Normalize every question to expected format
+            normalized = [normalize_quiz_question(q) for q in parse_json_list(quiz_json, name="quiz")]
+
+        if not normalized:
             raise ValueError("Empty or invalid quiz data")
 
-        # Normalize every question to expected format
-        normalized = [normalize_quiz_question(q) for q in questions]
-
+        if coverage:
+            return {"questions": normalized, "sampling": coverage}
         return {"questions": normalized}
     except Exception as e:
         print(f"Quiz Generation Error: {e}")
@@ -212,42 +403,24 @@ async def quiz_endpoint():
 
 # --- FLASHCARDS ENDPOINT ---
 @app.post("/generate-flashcards")
-async def flashcards_endpoint():
-    if not CURRENT_PDF_TEXT:
+async def flashcards_endpoint(request: SessionRequest):
+    pdf_text = await asyncio.to_thread(document_store.get_text, request.sessionId)
+    if not pdf_text:
         raise HTTPException(status_code=400, detail="No PDF uploaded")
 
     try:
-        prompt = f"""Create 10 flashcards from the following text.
-Each flashcard should have a "front" (question or key term) and a "back" (answer or definition).
-
-RULES:
-- Output ONLY valid JSON (a JSON array of objects)
-- Each object must have EXACT keys: front, back
-- front should be a key term or short question
-- back should be the answer or definition
-- Do NOT add any text, markdown, or code fences outside the JSON array
-
-TEXT:
-{CURRENT_PDF_TEXT[:5000]}"""
-
-        response = call_gemini(prompt).strip()
-        clean_json = response.replace("```json", "").replace("```", "").strip()
-        cards = json.loads(clean_json)
-
-        if isinstance(cards, dict):
-            cards = [cards]
-
-        if not isinstance(cards, list) or not cards:
+        coverage = None
+        if use_map_reduce(request.mode, pdf_text):
+            validated, coverage = await generate_flashcards_map_reduce(pdf_text, use_cache=not request.regenerate)
+        else:
+            response = await generate_flashcards(pdf_text, use_cache=not request.regenerate)
+            validated = validate_flashcards(parse_json_list(response, name="flashcards"))
+
+        if not validated:
             raise ValueError("Empty flashcard data")
 
-        # Ensure each card has the expected keys
-        validated = []
-        for card in cards:
-            validated.append({
-                "front": card.get("front", ""),
-                "back": card.get("back", ""),
-            })
-
+        if coverage:
+            return {"cards": validated, "sampling": coverage}
         return {"cards": validated}
     except Exception as e:
         print(f"Flashcard Generation Error: {e}")
@@ -257,65 +430,47 @@ TEXT:
             {"front": "Flashcard generation encountered an issue", "back": "Please try again. Make sure your GEMINI_API_KEY is set in the .env file."}
         ]}
 
-# --- VIDEO ENDPOINT ---
-# --- VIDEO ENDPOINT ---
-@app.post("/generate-video")
-async def video_endpoint():
-    if not CURRENT_PDF_TEXT:
-        return {"videoUrl": "", "script": "Upload a document first to generate a video summary."}
+# --- STUDY PACK ENDPOINT (summary + quiz + flashcards + glossary in one call) ---
+@app.post("/generate-study-pack")
+async def study_pack_endpoint(request: SessionRequest):
+    pdf_text = await asyncio.to_thread(document_store.get_text, request.sessionId)
+    if not pdf_text:
+        raise HTTPException(status_code=400, detail="No PDF uploaded")
 
     try:
-        # 1. Generate clean script using your template
-        prompt = TEACHING_SCRIPT_TEMPLATE.format(text=CURRENT_PDF_TEXT[:5000])
-        script = call_gemini(prompt).strip()
-        duration = calculate_duration(CURRENT_PDF_TEXT)
-
-        if script.startswith("AI Error"):
-            raise ValueError(script)
-
-        # 2. Get Audio and Images from your Microservice
-        print("Fetching Audio & Images from Port 5000...")
-        audio_url = ""
-        audio_duration = 0.0
-        images = []
-        try:
-            assets_res = requests.post(
-                "http://127.0.0.1:5000/generate-video-assets", 
-                json={"text": script}, timeout=600  # 10 min — TTS + KeyBERT can be slow on long scripts
-            )
-            if assets_res.status_code == 200:
-                assets_data = assets_res.json()
-                audio_url = assets_data.get("audioUrl", "")
-                audio_duration = assets_data.get("audioDuration", 0.0)
-                images = assets_data.get("images", [])
-                print(f"Got audio: {audio_url} (duration: {audio_duration:.2f}s)")
-        except Exception as e:
-            print(f"Service on Port 5000 failed: {e}")
+        pack = await generate_study_pack(pdf_text, use_cache=not request.regenerate)
+        if not pack["quiz"] and not pack["flashcards"]:
+            raise ValueError("Empty study pack")
+        return pack
+    except Exception as e:
+        print(f"Study Pack Generation Error: {e}")
+        raise HTTPException(status_code=502, detail="Study pack generation failed. Please try again.")
 
-        # 3. Send EVERYTHING (including audio + duration) to the Video Generator
-        video_url = ""
-        try:
-            node_payload = {
-                "script": script,
-                "title": "Document Summary",
-                "readingLevel": 5,
-                "images": images,
-                "audioUrl": audio_url,
-                "audioDuration": audio_duration
-            }
-            print("Rendering MP4 on Port 3001...")
-            node_res = requests.post("http://127.0.0.1:3001/generate-video", json=node_payload, timeout=1800)  # 30 min — Remotion rendering is very slow
-            if node_res.status_code == 200:
-                node_data = node_res.json()
-                if node_data.get("success"):
-                    video_url = f"http://127.0.0.1:3001{node_data['videoUrl']}"
-        except Exception as e:
-            print(f"Video Generator on Port 3001 failed: {e}")
+# --- VIDEO ENDPOINTS (background job + status polling) ---
+@app.post("/generate-video")
+async def video_endpoint(request: SessionRequest):
+    """
+    Queues script -> assets -> render as a background job and returns its ID
+    right away. Poll /video-status/{jobId} for per-stage progress and the result.
+    """
+    pdf_text = await asyncio.to_thread(document_store.get_text, request.sessionId)
+    if not pdf_text:
+        return {"videoUrl": "", "script": "Upload a document first to generate a video summary."}
 
-        return {"videoUrl": video_url, "script": script, "duration": duration}
-    except Exception as e:
-        print(f"Video script error: {e}")
-        return {"videoUrl": "", "script": "Video generation failed.", "duration": 60}
+    try:
+        job = await submit_video_job(pdf_text, use_cache=not request.regenerate)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Too many videos are being generated. Please try again shortly.")
+    return {"jobId": job.id, "status": job.status}
+
+
+@app.get("/video-status/{job_id}")
+async def video_status_endpoint(job_id: str):
+    # Jobs are published to the shared job store, so any worker can answer the poll
+    status = await asyncio.to_thread(video_queue.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired video job")
+    return status
 
 
 if __name__ == "__main__":
@@ -1,58 +1,120 @@
-from textblob import TextBlob
 import sys
 import os
 
 # Absolute imports from the backend root
-from core.gemini_client import call_gemini
+from core.gemini_client import call_gemini_async, stream_gemini_async
+from core.context_cache import context_cache
+from members.member1.retrieval import select_context
 from members.member1.interactive import (
     CHAT_SYSTEM_PROMPT,
     FRUSTRATED_INSTRUCTION,
     ELI5_SYSTEM_PROMPT
 )
 
+# Conversation memory per session: the last few turns, capped in characters too
+HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", 6))
+HISTORY_CHARS = int(os.getenv("CHAT_HISTORY_CHARS", 6000))
+
 def is_negative_sentiment(text: str) -> bool:
     """Simple polarity check with TextBlob"""
     try:
+        from textblob import TextBlob  # heavy (pulls in nltk): loaded on first chat or by the warm-up
         analysis = TextBlob(text)
         return analysis.sentiment.polarity < -0.1
     except:
         return False
 
-def build_chat_prompt(pdf_text: str, user_question: str) -> str:
-    """Combines system prompt + context + question"""
-    system_part = CHAT_SYSTEM_PROMPT
+def register_document(pdf_text: str) -> str:
+    """Register an uploaded document for cached chat context; returns its context ID ("" if not cached)."""
+    return context_cache.register(pdf_text, CHAT_SYSTEM_PROMPT)
+
+def document_context(document: dict):
+    """The session's chat context, re-registered if this process has not seen the document yet."""
+    context = context_cache.get(document.get("contextId", ""))
+    if context is None and document.get("contextId"):
+        context = context_cache.get(register_document(document["text"]))
+    return context
+
+def remember_turn(history: list, user_question: str, answer: str) -> list:
+    """Append one exchange and drop the oldest until the history fits its bounds."""
+    if not answer or answer.startswith(("AI Error", "Error")):
+        return list(history or [])
+    history = list(history or []) + [{"question": user_question.strip(), "answer": answer.strip()}]
+    history = history[-HISTORY_TURNS:]
+    while len(history) > 1 and sum(len(t["question"]) + len(t["answer"]) for t in history) > HISTORY_CHARS:
+        history.pop(0)
+    return history
 
+def build_turn_prompt(user_question: str, history: list = None) -> str:
+    """The per-turn part of a chat prompt: recent conversation + question (no document)"""
+    parts = []
     if is_negative_sentiment(user_question):
-        system_part += "\n" + FRUSTRATED_INSTRUCTION
+        parts.append(FRUSTRATED_INSTRUCTION.strip())
+    if history:
+        conversation = "\n".join(f"Student: {t['question']}\nTutor: {t['answer']}" for t in history)
+        parts.append(f"=== CONVERSATION SO FAR ===\n{conversation}")
+    parts.append(f"=== STUDENT QUESTION ===\n{user_question.strip()}\n\nYour answer:")
+    return "\n\n".join(parts)
 
-    return f"""{system_part}
+def build_chat_prompt(pdf_text: str, user_question: str, history: list = None) -> str:
+    """Combines system prompt + context + question"""
+    return f"""{CHAT_SYSTEM_PROMPT}
 
 === DOCUMENT CONTENT (use only this) ===
 {pdf_text.strip()}
 
-=== STUDENT QUESTION ===
-{user_question.strip()}
+{build_turn_prompt(user_question, history)}"""
 
-Your answer:"""
+def _chat_prompts(pdf_text: str, user_question: str, index, history):
+    """
+    (self-contained fallback prompt factory, per-turn prompt for a cached document
+    context). The fallback only retrieves passages when a turn actually needs it.
+    """
+    async def fallback():
+        context = await select_context(pdf_text, user_question, index)
+        return build_chat_prompt(context, user_question, history)
+    return fallback, build_turn_prompt(user_question, history)
 
-def get_chat_response(pdf_text: str, user_question: str) -> str:
-    """Main function for normal / frustrated chat"""
-    prompt = build_chat_prompt(pdf_text, user_question)
+async def get_chat_response(pdf_text: str, user_question: str, index=None, history: list = None, context=None,
+                            use_cache: bool = False) -> str:
+    """
+    Main function for normal / frustrated chat.
+    With a cached document context only the conversation and question are sent;
+    otherwise a chunk index limits the document to the relevant passages.
+    Answers are not cached unless use_cache=True: a student re-asking a
+    question expects a fresh answer, not the same canned one.
+    """
     try:
-        return call_gemini(prompt).strip()
+        prompt, turn = _chat_prompts(pdf_text, user_question, index, history)
+        return (await call_gemini_async(prompt, use_cache=use_cache, cached_context=context, cached_prompt=turn)).strip()
     except Exception as e:
         return f"Error connecting to Gemini: {str(e)}"
 
-def eli5_answer(previous_answer: str) -> str:
-    """Rewrite any previous answer in ELI5 style"""
-    prompt = f"""{ELI5_SYSTEM_PROMPT}
+def build_eli5_prompt(previous_answer: str) -> str:
+    return f"""{ELI5_SYSTEM_PROMPT}
 
 Original answer to rewrite:
 {previous_answer.strip()}
 
 Simplified version for 5-year-old:"""
 
+async def eli5_answer(previous_answer: str, use_cache: bool = False) -> str:
+    """Rewrite any previous answer in ELI5 style (uncached unless use_cache=True)"""
+    prompt = build_eli5_prompt(previous_answer)
+
     try:
-        return call_gemini(prompt).strip()
+        return (await call_gemini_async(prompt, use_cache=use_cache)).strip()
     except Exception as e:
-        return f"Error in ELI5 mode: {str(e)}"
\ No newline at end of file
+        return f"Error in ELI5 mode: {str(e)}"
+
+async def stream_chat_response(pdf_text: str, user_question: str, index=None, history: list = None, context=None,
+                               use_cache: bool = False):
+    """Same as get_chat_response, but yields the answer as it is generated"""
+    prompt, turn = _chat_prompts(pdf_text, user_question, index, history)
+    async for piece in stream_gemini_async(prompt, use_cache=use_cache, cached_context=context, cached_prompt=turn):
+        yield piece
+
+async def stream_eli5_answer(previous_answer: str, use_cache: bool = False):
+    """Same as eli5_answer, but yields the simplified answer as it is generated"""
+    async for piece in stream_gemini_async(build_eli5_prompt(previous_answer), use_cache=use_cache):
+        yield piece
@@ -0,0 +1,175 @@
+import os
+import re
+import asyncio
+import numpy as np
+
+from core.gemini_client import embed_texts_async
+
+# Rough chars-per-token ratio used for prompt budgeting (no tokenizer needed)
+CHARS_PER_TOKEN = 4
+CHUNK_WORDS = int(os.getenv("CHAT_CHUNK_WORDS", 180))
+CHUNK_OVERLAP = int(os.getenv("CHAT_CHUNK_OVERLAP", 30))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKENS", 3000))
+# Weight of the embedding score when embeddings are available (0 = pure BM25)
+EMBEDDING_WEIGHT = float(os.getenv("CHAT_EMBEDDING_WEIGHT", 0.5))
+# Embedding-based scoring costs one embedding call per chunk batch at upload and one per question
+USE_EMBEDDINGS = os.getenv("CHAT_EMBEDDINGS", "0") == "1"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset("""
+a an and are as at be been but by can do does for from has have how i if in into is it its
+me my of on or our so than that the their them then there these they this to was we were what
+when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list:
+    """Split text into overlapping word windows."""
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, chunk_words - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+class ChunkIndex:
+    """
+    BM25 index over document chunks, stored as flat posting arrays so a query
+    is a handful of vectorized NumPy gathers instead of a Python loop per chunk.
+    Optional dense embeddings can be attached for hybrid scoring.
+    """
+
+    def __init__(self, chunks: list, k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.embeddings = None
+
+        vocab = {}
+        doc_ids, term_ids, lengths = [], [], []
+        for i, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            lengths.append(len(tokens))
+            for tok in tokens:
+                term_ids.append(vocab.setdefault(tok, len(vocab)))
+                doc_ids.append(i)
+
+        self.vocab = vocab
+        self.doc_len = np.asarray(lengths, dtype=np.float32)
+        self.avg_len = float(self.doc_len.mean()) if len(chunks) else 0.0
+
+        # Count (term, chunk) pairs and sort them by term -> CSR-style postings
+        if term_ids:
+            pairs = np.asarray(term_ids, dtype=np.int64) * max(len(chunks), 1) + np.asarray(doc_ids, dtype=np.int64)
+            unique_pairs, tf = np.unique(pairs, return_counts=True)
+            terms = unique_pairs // max(len(chunks), 1)
+            self.post_docs = (unique_pairs % max(len(chunks), 1)).astype(np.int32)
+            self.post_tf = tf.astype(np.float32)
+            df = np.bincount(terms, minlength=len(vocab))
+            self.offsets = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        else:
+            self.post_docs = np.zeros(0, dtype=np.int32)
+            self.post_tf = np.zeros(0, dtype=np.float32)
+            df = np.zeros(0, dtype=np.int64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+
+        n = len(chunks)
+        self.idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def memory_bytes(self) -> int:
+        size = sum(len(c) for c in self.chunks)
+        size += self.post_docs.nbytes + self.post_tf.nbytes + self.offsets.nbytes + self.idf.nbytes
+        size += len(self.vocab) * 64
+        if self.embeddings is not None:
+            size += self.embeddings.nbytes
+        return size
+
+    def attach_embeddings(self, vectors):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.embeddings = matrix / np.maximum(norms, 1e-8)
+
+    def bm25_scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(self.avg_len, 1e-8))
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.post_docs[start:end]
+            tf = self.post_tf[start:end]
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + norm[docs])
+        return scores
+
+    def search(self, query: str, k: int = 8, query_embedding=None) -> list:
+        """Return [(chunk_index, score)] best first."""
+        if not self.chunks:
+            return []
+        scores = self.bm25_scores(query)
+        if self.embeddings is not None and query_embedding is not None and EMBEDDING_WEIGHT > 0:
+            q = np.asarray(query_embedding, dtype=np.float32)
+            q = q / max(float(np.linalg.norm(q)), 1e-8)
+            dense = self.embeddings @ q
+            top = scores.max()
+            lexical = scores / top if top > 0 else scores
+            scores = (1 - EMBEDDING_WEIGHT) * lexical + EMBEDDING_WEIGHT * dense
+        # Stable sort: ties (e.g. a query with no matching terms) favour earlier chunks
+        best = np.argsort(-scores, kind="stable")[:k]
+        return [(int(i), float(scores[i])) for i in best]
+
+    def build_context(self, query: str, token_budget: int = CONTEXT_TOKEN_BUDGET, query_embedding=None) -> str:
+        """
+        Pick the most relevant chunks that fit in token_budget and return them
+        in document order, so the prompt size stays flat as the document grows.
+        """
+        char_budget = token_budget * CHARS_PER_TOKEN
+        max_k = max(1, char_budget // max(CHUNK_WORDS * 5, 1) + 2)
+        picked, used = [], 0
+        for idx, score in self.search(query, k=max_k * 2, query_embedding=query_embedding):
+            chunk = self.chunks[idx]
+            if picked and used + len(chunk) > char_budget:
+                continue
+            picked.append(idx)
+            used += len(chunk)
+            if used >= char_budget:
+                break
+        return "\n...\n".join(self.chunks[i] for i in sorted(picked))
+
+
+def build_chunk_index(text: str) -> ChunkIndex:
+    return ChunkIndex(chunk_text(text))
+
+
+async def index_document(text: str) -> ChunkIndex:
+    """Build the chunk index off the event loop, adding embeddings if enabled."""
+    index = await asyncio.to_thread(build_chunk_index, text)
+    if USE_EMBEDDINGS and len(index):
+        vectors = await embed_texts_async(index.chunks)
+        if vectors:
+            index.attach_embeddings(vectors)
+    return index
+
+
+async def select_context(pdf_text: str, question: str, index=None, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Whole document if it fits the budget, otherwise the top-k relevant chunks."""
+    if index is None or len(pdf_text) <= token_budget * CHARS_PER_TOKEN:
+        return pdf_text
+    query_embedding = None
+    if index.embeddings is not None:
+        vectors = await embed_texts_async([question])
+        if vectors:
+            query_embedding = vectors[0]
+    return index.build_context(question, token_budget, query_embedding=query_embedding)
@@ -0,0 +1,44 @@
+# Absolute imports from the backend root
+from core.gemini_client import call_gemini_async
+from core.map_reduce import split_sections, sampling, map_sections, reduce_items, per_section_count
+from members.member2.tutor_persona import FLASHCARD_PROMPT, FLASHCARDS_SCHEMA
+from members.member2.quiz_format import parse_json_list
+
+
+def validate_flashcards(cards: list) -> list:
+    """Ensure each card has the expected keys"""
+    validated = []
+    for card in cards:
+        if not isinstance(card, dict):
+            continue
+        validated.append({
+            "front": card.get("front", ""),
+            "back": card.get("back", ""),
+        })
+    return validated
+
+
+async def generate_flashcards(pdf_text: str, use_cache: bool = True) -> str:
+    """
+    Combines FLASHCARD_PROMPT with the start of the PDF text to get JSON flashcards
+    """
+    full_prompt = f"{FLASHCARD_PROMPT.format(count=10)}{pdf_text[:5000]}"
+    return (await call_gemini_async(full_prompt, use_cache=use_cache, response_schema=FLASHCARDS_SCHEMA)).strip()
+
+
+async def generate_flashcards_map_reduce(pdf_text: str, num_cards: int = 10, use_cache: bool = True) -> tuple:
+    """
+    Map-reduce flashcards for long documents: cards per section (concurrently),
+    then deduplicated by their front and picked evenly across sections.
+    Returns (cards, sampling) where sampling says how much of the text was read.
+    """
+    sections = split_sections(pdf_text)
+    count = per_section_count(num_cards, len(sections))
+
+    async def cards_for(index, section):
+        prompt = f"{FLASHCARD_PROMPT.format(count=count)}{section}"
+        response = (await call_gemini_async(prompt, use_cache=use_cache, response_schema=FLASHCARDS_SCHEMA)).strip()
+        return [card for card in validate_flashcards(parse_json_list(response, name="flashcards")) if card["front"]]
+
+    per_section = await map_sections(sections, cards_for)
+    return reduce_items(per_section, num_cards, key=lambda card: card["front"]), sampling(pdf_text, sections)
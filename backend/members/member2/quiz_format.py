@@ -4,22 +4,93 @@ import sys
 import os
 
 # Absolute imports from the backend root
-from core.gemini_client import call_gemini
-from members.member2.tutor_persona import QUIZ_PROMPT
+from core.gemini_client import call_gemini_async
+from core.json_parser import parse_llm_json
+from core.map_reduce import split_sections, sampling, map_sections, reduce_items, per_section_count
+from members.member2.tutor_persona import QUIZ_PROMPT, QUIZ_SECTION_PROMPT, QUIZ_SCHEMA
 
 class Quiz(BaseModel):
     question: str
     options: List[str]
     answer: str
 
-def generate_quiz(pdf_text: str):
+async def generate_quiz(pdf_text: str, use_cache: bool = True):
     """
     Combines the strict QUIZ_PROMPT with PDF text to get a JSON quiz
+    use_cache=False skips the response cache so "regenerate" gives new questions.
     """
     full_prompt = f"{QUIZ_PROMPT}\n\n{pdf_text[:5000]}"
     try:
         # Calls the function defined in core/gemini_client.py
-        response = call_gemini(full_prompt).strip()
+        response = (await call_gemini_async(full_prompt, use_cache=use_cache, response_schema=QUIZ_SCHEMA)).strip()
         return response 
     except Exception as e:
-        return {"error": f"Quiz Generation failed: {str(e)}"}
\ No newline at end of file
+        return {"error": f"Quiz Generation failed: {str(e)}"}
+
+
+def parse_json_list(raw: str, name: str = "list") -> list:
+    """
+    Parse a JSON array from model output (tolerates code fences and stray prose).
+    A single object becomes a 1-item list; {"questions": [...]} style wrappers are unwrapped.
+    """
+    data = parse_llm_json(raw, expect=(list, dict), name=name)
+    if isinstance(data, dict):
+        lists = [v for v in data.values() if isinstance(v, list) and v and all(isinstance(i, dict) for i in v)]
+        data = lists[0] if len(lists) == 1 else [data]
+    return data
+
+
+def parse_json_object(raw: str, name: str = "object") -> dict:
+    """Parse a JSON object from model output (tolerates code fences and stray prose)."""
+    return parse_llm_json(raw, expect=dict, name=name)
+
+
+def normalize_quiz_question(q: dict) -> dict:
+    """Normalize a quiz question to match frontend's expected format."""
+    question_text = q.get("question", "")
+    options = q.get("options", [])
+    explanation = q.get("explanation", "")
+
+    # Handle correctAnswer (index) vs answer (text)
+    if "correctAnswer" in q:
+        correct_answer = q["correctAnswer"]
+        if isinstance(correct_answer, str):
+            try:
+                correct_answer = options.index(correct_answer)
+            except ValueError:
+                correct_answer = 0
+    elif "answer" in q:
+        answer_text = q["answer"]
+        try:
+            correct_answer = options.index(answer_text)
+        except ValueError:
+            correct_answer = 0
+    else:
+        correct_answer = 0
+
+    return {
+        "question": question_text,
+        "options": options,
+        "correctAnswer": int(correct_answer),
+        "explanation": explanation,
+    }
+
+
+async def generate_quiz_map_reduce(pdf_text: str, num_questions: int = 5, use_cache: bool = True) -> tuple:
+    """
+    Map-reduce quiz for long documents: a few questions per section
+    (generated concurrently), then duplicates removed and the final set
+    picked evenly across sections. Returns (normalized questions, sampling)
+    where sampling says how much of the text was read.
+    """
+    sections = split_sections(pdf_text)
+    count = per_section_count(num_questions, len(sections))
+
+    async def questions_for(index, section):
+        prompt = f"{QUIZ_SECTION_PROMPT.format(count=count)}\n\n{section}"
+        response = (await call_gemini_async(prompt, use_cache=use_cache, response_schema=QUIZ_SCHEMA)).strip()
+        questions = [normalize_quiz_question(q) for q in parse_json_list(response, name="quiz") if isinstance(q, dict)]
+        return [q for q in questions if q["question"] and len(q["options"]) >= 2]
+
+    per_section = await map_sections(sections, questions_for)
+    return reduce_items(per_section, num_questions, key=lambda q: q["question"]), sampling(pdf_text, sections)
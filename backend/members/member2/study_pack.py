@@ -0,0 +1,52 @@
+# Absolute imports from the backend root
+from core.gemini_client import call_gemini_async
+from members.member2.tutor_persona import STUDY_PACK_PROMPT, STUDY_PACK_SCHEMA
+from members.member2.quiz_format import parse_json_object, normalize_quiz_question
+from members.member2.flashcards import validate_flashcards
+
+
+def validate_glossary(terms) -> list:
+    """Keep only {term, definition} objects with both fields filled in"""
+    if not isinstance(terms, list):
+        return []
+    return [
+        {"term": str(t["term"]), "definition": str(t["definition"])}
+        for t in terms
+        if isinstance(t, dict) and t.get("term") and t.get("definition")
+    ]
+
+
+def validate_study_pack(pack: dict) -> dict:
+    """
+    Shape the raw JSON into what the separate endpoints return:
+    normalized quiz questions, validated flashcards and glossary entries.
+    """
+    quiz = pack.get("quiz") or []
+    flashcards = pack.get("flashcards") or []
+    summary = pack.get("summary") or ""
+    if isinstance(summary, list):
+        summary = "\n".join(f"- {line}" for line in summary)
+
+    return {
+        "summary": str(summary).strip(),
+        "quiz": [
+            q for q in (normalize_quiz_question(q) for q in quiz if isinstance(q, dict))
+            if q["question"] and len(q["options"]) >= 2
+        ] if isinstance(quiz, list) else [],
+        "flashcards": [
+            c for c in validate_flashcards(flashcards) if c["front"]
+        ] if isinstance(flashcards, list) else [],
+        "glossary": validate_glossary(pack.get("glossary")),
+    }
+
+
+async def generate_study_pack(pdf_text: str, use_cache: bool = True) -> dict:
+    """
+    One Gemini call for summary, quiz, flashcards and glossary, instead of
+    four calls that each re-send the same document context.
+    """
+    full_prompt = f"{STUDY_PACK_PROMPT}\n{pdf_text[:5000]}"
+    response = (await call_gemini_async(full_prompt, use_cache=use_cache, response_schema=STUDY_PACK_SCHEMA)).strip()
+    if response.startswith("AI Error"):
+        raise RuntimeError(response)
+    return validate_study_pack(parse_json_object(response, name="study_pack"))
@@ -15,3 +15,106 @@ RULES:
 
 TEXT:
 """
+
+# Same rules as QUIZ_PROMPT, for one section of a longer document (map-reduce mode)
+QUIZ_SECTION_PROMPT = """
+You are a strict teacher.
+
+Create {count} multiple-choice questions from the text below.
+The text is one section of a longer document; only ask about this section.
+
+RULES:
+- Output ONLY valid JSON (a JSON array of objects)
+- Do NOT add explanations, markdown, or text outside the JSON
+- Do NOT wrap in code fences
+- Each object must have EXACT keys:
+  question, options, correctAnswer, explanation
+- options must be a list of 4 strings
+- correctAnswer must be the INDEX (0, 1, 2, or 3) of the correct option
+- explanation must be a brief explanation of why the answer is correct
+
+TEXT:
+"""
+
+FLASHCARD_PROMPT = """Create {count} flashcards from the following text.
+Each flashcard should have a "front" (question or key term) and a "back" (answer or definition).
+
+RULES:
+- Output ONLY valid JSON (a JSON array of objects)
+- Each object must have EXACT keys: front, back
+- front should be a key term or short question
+- back should be the answer or definition
+- Do NOT add any text, markdown, or code fences outside the JSON array
+
+TEXT:
+"""
+
+# Summary + quiz + flashcards + glossary in one call (one copy of the document context)
+STUDY_PACK_PROMPT = """
+You are an expert tutor preparing a complete study pack for the text below.
+
+Return ONE valid JSON object with EXACTLY these keys:
+- "summary": a clear, structured summary of the text using Markdown bullet points for key topics, under 200 words
+- "quiz": a JSON array of 5 multiple-choice questions; each object has EXACT keys
+  question, options, correctAnswer, explanation
+  (options is a list of 4 strings, correctAnswer is the INDEX 0-3 of the correct option,
+  explanation briefly says why the answer is correct)
+- "flashcards": a JSON array of 10 objects with EXACT keys front, back
+  (front is a key term or short question, back is the answer or definition)
+- "glossary": a JSON array of the 5 most important technical terms; each object has EXACT keys
+  term, definition (a short, accurate, 1-sentence definition based strictly on the text)
+
+RULES:
+- Output ONLY the JSON object
+- Do NOT add explanations, markdown, or text outside the JSON
+- Do NOT wrap in code fences
+
+TEXT:
+"""
+
+# ==========================================
+# RESPONSE SCHEMAS (structured JSON output)
+# ==========================================
+QUIZ_QUESTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "question": {"type": "STRING"},
+        "options": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "correctAnswer": {"type": "INTEGER"},
+        "explanation": {"type": "STRING"},
+    },
+    "required": ["question", "options", "correctAnswer", "explanation"],
+}
+
+FLASHCARD_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "front": {"type": "STRING"},
+        "back": {"type": "STRING"},
+    },
+    "required": ["front", "back"],
+}
+
+GLOSSARY_TERM_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "term": {"type": "STRING"},
+        "definition": {"type": "STRING"},
+    },
+    "required": ["term", "definition"],
+}
+
+QUIZ_SCHEMA = {"type": "ARRAY", "items": QUIZ_QUESTION_SCHEMA}
+FLASHCARDS_SCHEMA = {"type": "ARRAY", "items": FLASHCARD_SCHEMA}
+GLOSSARY_SCHEMA = {"type": "ARRAY", "items": GLOSSARY_TERM_SCHEMA}
+
+STUDY_PACK_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING"},
+        "quiz": QUIZ_SCHEMA,
+        "flashcards": FLASHCARDS_SCHEMA,
+        "glossary": {"type": "ARRAY", "items": GLOSSARY_TERM_SCHEMA},
+    },
+    "required": ["summary", "quiz", "flashcards", "glossary"],
+}
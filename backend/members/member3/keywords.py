@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from core.metrics import registry
+
+# Concurrent requests arriving within this window share one embedding pass
+BATCH_WINDOW_SECONDS = float(os.getenv("KEYWORD_BATCH_WINDOW_MS", 25)) / 1000
+MAX_BATCH_SIZE = int(os.getenv("KEYWORD_MAX_BATCH", 16))
+DOC_CACHE_SIZE = 2000
+WORD_CACHE_SIZE = 50000
+
+KEYWORD_BATCH_SECONDS = registry.histogram(
+    "keyword_batch_duration_seconds", "KeyBERT embedding + scoring time per batch (includes model load)")
+KEYWORD_BATCH_SIZE = registry.histogram(
+    "keyword_batch_size", "Texts per keyword batch", buckets=(1, 2, 4, 8, 16, 32))
+
+
+class _LRU:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class KeywordEngine:
+    """
+    Shared KeyBERT-style keyword extractor.
+    - The sentence-transformer model is loaded on first use (or by warm_up()).
+    - Requests that arrive together are micro-batched into one embedding pass.
+    - Document and candidate-word embeddings are cached by text, so repeated
+      scripts and common words are never embedded twice.
+    Scoring matches KeyBERT's default: cosine similarity between the document
+    and each candidate word, top_n best.
+    """
+
+    def __init__(self, ngram_range=(1, 1), stop_words="english", top_n: int = 5):
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.top_n = top_n
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._doc_cache = _LRU(DOC_CACHE_SIZE)
+        self._word_cache = _LRU(WORD_CACHE_SIZE)
+        self._queue = None
+        self._batcher = None
+
+    # --- model loading ---
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def _load(self):
+        with self._load_lock:
+            if self._model is None:
+                print("Loading KeyBERT model... (This may take a moment)")
+                from keybert import KeyBERT
+                self._model = KeyBERT()
+        return self._model
+
+    async def warm_up(self):
+        """Load the model (and run one tiny extraction) off the event loop."""
+        await asyncio.to_thread(self._extract_batch, ["warm up the keyword model"])
+
+    # --- public API ---
+    async def extract(self, text: str) -> list:
+        """Top keywords for one text; concurrent callers are batched together."""
+        loop = asyncio.get_running_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._batcher is None or self._batcher.done():
+            self._batcher = asyncio.create_task(self._run_batcher())
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "cachedDocuments": len(self._doc_cache),
+            "cachedWords": len(self._word_cache),
+        }
+
+    # --- batching ---
+    async def _run_batcher(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + BATCH_WINDOW_SECONDS
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            KEYWORD_BATCH_SIZE.observe(len(texts))
+            try:
+                with KEYWORD_BATCH_SECONDS.time():
+                    results = await asyncio.to_thread(self._extract_batch, texts)
+                for (_, future), keywords in zip(batch, results):
+                    if not future.done():
+                        future.set_result(keywords)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    # --- extraction (runs in a worker thread) ---
+    def _candidates(self, text: str) -> list:
+        from sklearn.feature_extraction.text import CountVectorizer
+        try:
+            vectorizer = CountVectorizer(ngram_range=self.ngram_range, stop_words=self.stop_words)
+            vectorizer.fit([text])
+            return list(vectorizer.get_feature_names_out())
+        except ValueError:
+            # Text contained only stop words
+            return []
+
+    def _embed_missing(self, cache: _LRU, items: dict, embedder) -> dict:
+        """items: cache key -> text. Embeds every uncached text in one pass."""
+        vectors = {key: cache.get(key) for key in items}
+        missing = [key for key, vec in vectors.items() if vec is None]
+        if missing:
+            embedded = embedder.embed([items[key] for key in missing])
+            for key, vec in zip(missing, embedded):
+                vec = np.asarray(vec, dtype=np.float32)
+                vec = vec / max(float(np.linalg.norm(vec)), 1e-8)
+                cache.put(key, vec)
+                vectors[key] = vec
+        return vectors
+
+    def _extract_batch(self, texts: list) -> list:
+        embedder = self._load().model
+        candidates = [self._candidates(text) for text in texts]
+
+        doc_vectors = self._embed_missing(
+            self._doc_cache, {_text_key(t): t for t in texts}, embedder
+        )
+        word_vectors = self._embed_missing(
+            self._word_cache, {w: w for words in candidates for w in words}, embedder
+        )
+
+        results = []
+        for text, words in zip(texts, candidates):
+            if not words:
+                results.append([])
+                continue
+            doc = doc_vectors[_text_key(text)]
+            matrix = np.stack([word_vectors[w] for w in words])
+            scores = matrix @ doc
+            best = np.argsort(-scores)[:self.top_n]
+            results.append([(words[i], round(float(scores[i]), 4)) for i in best])
+        return results
+
+
+# Shared instance used by the asset service
+keyword_engine = KeywordEngine()
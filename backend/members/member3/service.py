@@ -1,15 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from keybert import KeyBERT
-import edge_tts
 import asyncio
-from mutagen.mp3 import MP3
 import os
+import re
 import uuid
+import shutil
+import hashlib
+import time
 import uvicorn
 
+from core.file_handler import delete_file
+from core.metrics import registry, install_http_metrics
+from core.storage import StorageManager
+from core.warmup import WarmUp
+from members.member3.keywords import keyword_engine
+
 app = FastAPI()
 
 app.add_middleware(
@@ -20,53 +27,210 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- METRICS (GET /metrics, Prometheus text format) ---
+install_http_metrics(app)
+ASSET_STAGE_SECONDS = registry.histogram(
+    "asset_stage_duration_seconds", "Time spent per asset stage (tts, keywords)", ("stage",))
+TTS_SEGMENT_SECONDS = registry.histogram(
+    "tts_segment_duration_seconds", "Time to produce one narration segment", ("cache",))
+
 # Use absolute path to ensure the media folder is created in the right place
 MEDIA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media')
 os.makedirs(MEDIA_FOLDER, exist_ok=True)
 app.mount("/media", StaticFiles(directory=MEDIA_FOLDER), name="media")
+TTS_CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tts_cache')
+# Base URL the renderer uses to fetch narration audio (defaults to the URL this request came in on)
+ASSET_PUBLIC_URL = os.getenv("ASSET_PUBLIC_URL", "").rstrip("/")
 
-print("Loading KeyBERT model... (This may take a moment)")
-kw_model = KeyBERT()
+# Narration MP3s are named by content hash and referenced by the video job using them
+media_storage = StorageManager(
+    "MediaStorage", MEDIA_FOLDER,
+    max_bytes=int(os.getenv("MEDIA_MAX_BYTES", 2 * 1024 * 1024 * 1024)),
+    max_age_seconds=float(os.getenv("MEDIA_MAX_AGE_HOURS", 24)) * 3600,
+)
+tts_storage = StorageManager(
+    "TTSCache", TTS_CACHE_FOLDER,
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+    max_age_seconds=float(os.getenv("TTS_CACHE_MAX_AGE_HOURS", 24 * 30)) * 3600,
+)
 
 class VideoRequest(BaseModel):
     text: str
+    jobId: str = ""  # video job that needs the audio until it has rendered
+
+class ReleaseRequest(BaseModel):
+    jobId: str
+
+# --- KEYWORDS (KeyBERT loads lazily, see members/member3/keywords.py) ---
+@app.get("/")
+def health_check():
+    return {
+        "status": "Asset Service is Running",
+        "ready": startup_warmup.ready,
+        "warmup": startup_warmup.status(),
+        "keywords": keyword_engine.stats(),
+    }
+
+@app.get("/stats/storage")
+def storage_stats():
+    return {"media": media_storage.stats(), "ttsCache": tts_storage.stats()}
+
+@app.post("/media/release")
+def release_media(request: ReleaseRequest):
+    """Called once a job has rendered, so its audio becomes collectable"""
+    media_storage.release(request.jobId)
+    return {"released": request.jobId}
+
+@app.post("/warmup")
+async def warmup():
+    """Load the KeyBERT model now instead of on the first video request"""
+    await keyword_engine.warm_up()
+    return {"keywords": keyword_engine.stats()}
+
+# TTS libraries always warm up; the KeyBERT model (slow, memory-hungry) only with KEYWORD_WARMUP=1
+startup_warmup = WarmUp("AssetService")
+startup_warmup.import_step("tts", "edge_tts", "mutagen.mp3")
+if os.getenv("KEYWORD_WARMUP", "0") == "1":
+    startup_warmup.step("keywords", keyword_engine.warm_up)
+
+@app.on_event("startup")
+async def warm_up_in_background():
+    startup_warmup.start()
+
+@app.on_event("startup")
+async def start_storage_collectors():
+    media_storage.start_collector()
+    tts_storage.start_collector()
+
+# --- TEXT-TO-SPEECH (sentence segments, synthesized in parallel and cached) ---
+VOICE = "en-US-AriaNeural"
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", 4))
+SEGMENT_MAX_CHARS = int(os.getenv("TTS_SEGMENT_CHARS", 400))
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_segments(script: str, max_chars: int = SEGMENT_MAX_CHARS) -> list:
+    """Group whole sentences into segments of up to max_chars (long sentences stay whole)."""
+    segments, current = [], ""
+    for sentence in SENTENCE_PATTERN.split(script.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+def segment_cache_path(text: str, voice: str = VOICE) -> str:
+    digest = hashlib.sha256(f"{voice}\0{text}".encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_FOLDER, f"{digest}.mp3")
+
+
+def mp3_duration(path: str, text: str) -> float:
+    """Measure the actual MP3 duration so the video engine can match it"""
+    try:
+        from mutagen.mp3 import MP3
+        return MP3(path).info.length
+    except Exception as e:
+        print(f"Could not read MP3 duration: {e}")
+        # Fallback: estimate from word count (~150 WPM)
+        return (len(text.split()) / 150) * 60
+
+
+def _use_cached_segment(path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    tts_storage.touch(path)
+    return True
+
+
+async def synthesize_segment(text: str, semaphore: asyncio.Semaphore, voice: str = VOICE) -> tuple:
+    """Returns (path, duration) for one segment, synthesizing only on a cache miss."""
+    path = segment_cache_path(text, voice)
+    started = time.perf_counter()
+    # File work and MP3 parsing run in worker threads, off the event loop
+    if await asyncio.to_thread(_use_cached_segment, path):
+        cache = "hit"
+    else:
+        async with semaphore:
+            started = time.perf_counter()  # don't count time queued behind other segments
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                import edge_tts  # loaded on the first synthesis, not at service start
+                communicate = edge_tts.Communicate(text, voice)
+                await communicate.save(tmp_path)
+                await asyncio.to_thread(os.replace, tmp_path, path)
+            finally:
+                # Only left behind when synthesis failed part-way
+                await asyncio.to_thread(delete_file, tmp_path)
+        cache = "miss"
+    duration = await asyncio.to_thread(mp3_duration, path, text)
+    TTS_SEGMENT_SECONDS.observe(time.perf_counter() - started, cache=cache)
+    return path, duration
+
+
+def _concatenate(paths: list, output_path: str):
+    with open(output_path, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out)
+
+
+async def synthesize_script(script: str, output_path: str, voice: str = VOICE) -> tuple:
+    """
+    Synthesizes all segments concurrently (bounded by TTS_CONCURRENCY) and
+    concatenates them in order into one MP3 (MP3 frames can be joined directly).
+    Returns (total_duration, [{"text", "start", "duration"}]).
+    """
+    segments = split_segments(script)
+    semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+    results = await asyncio.gather(*(synthesize_segment(text, semaphore, voice) for text in segments))
+    await asyncio.to_thread(_concatenate, [path for path, _ in results], output_path)
+
+    timeline = []
+    start = 0.0
+    for text, (_, duration) in zip(segments, results):
+        timeline.append({"text": text, "start": round(start, 3), "duration": round(duration, 3)})
+        start += duration
+    return start, timeline
+
 
 @app.post("/generate-video-assets")
-def generate_assets(request: VideoRequest):
+async def generate_assets(request: VideoRequest, http_request: Request):
     full_script = request.text
     if not full_script:
         raise HTTPException(status_code=400, detail="No text provided")
     
-    print("Generating Full Audio via Edge-TTS...")
-    audio_filename = f"{uuid.uuid4()}.mp3"
-    filepath = os.path.join(MEDIA_FOLDER, audio_filename)
+    print("Generating Audio via Edge-TTS (parallel segments)...")
+    tmp_path = media_storage.temp_path(".mp3")
     
-    # Generate ONE full audio file for the Remotion player using Edge-TTS neural voice
-    communicate = edge_tts.Communicate(full_script, "en-US-AriaNeural")
-    asyncio.run(communicate.save(filepath))
-    audio_url = f"http://127.0.0.1:5000/media/{audio_filename}"
-
-    # Measure the actual MP3 duration so the video engine can match it
-    audio_duration = 0.0
+    # ONE full audio file for the Remotion player, stitched from cached neural-voice segments
     try:
-        audio_info = MP3(filepath)
-        audio_duration = audio_info.info.length  # duration in seconds
-        print(f"Audio duration: {audio_duration:.2f}s")
+        with ASSET_STAGE_SECONDS.time(stage="tts"):
+            audio_duration, audio_segments = await synthesize_script(full_script, tmp_path)
+        filepath = await asyncio.to_thread(media_storage.adopt, tmp_path, ".mp3")
+        if request.jobId:
+            media_storage.reference(filepath, request.jobId)
     except Exception as e:
-        print(f"Could not read MP3 duration: {e}")
-        # Fallback: estimate from word count (~150 WPM for gTTS)
-        word_count = len(full_script.split())
-        audio_duration = (word_count / 150) * 60
-        print(f"Estimated audio duration: {audio_duration:.2f}s")
+        print(f"TTS Error: {e}")
+        raise HTTPException(status_code=502, detail=f"Text-to-speech failed: {e}")
+    finally:
+        # adopt() has moved it on success; this only removes a half-written file
+        await asyncio.to_thread(delete_file, tmp_path)
+    base_url = ASSET_PUBLIC_URL or str(http_request.base_url).rstrip("/")
+    audio_url = f"{base_url}/media/{os.path.basename(filepath)}"
+    print(f"Audio duration: {audio_duration:.2f}s ({len(audio_segments)} segments)")
 
     print("Extracting Smart Image Keywords via KeyBERT...")
     try:
-        keywords_data = kw_model.extract_keywords(
-            full_script, 
-            keyphrase_ngram_range=(1, 1), 
-            stop_words='english', 
-            top_n=5
-        )
+        # Batched with any other concurrent requests into one embedding pass
+        with ASSET_STAGE_SECONDS.time(stage="keywords"):
+            keywords_data = await keyword_engine.extract(full_script)
         keywords = [kw[0] for kw in keywords_data]
     except Exception as e:
         print(f"KeyBERT Error: {e}")
@@ -83,6 +247,7 @@ def generate_assets(request: VideoRequest):
     return {
         "audioUrl": audio_url,
         "audioDuration": audio_duration,
+        "audioSegments": audio_segments,
         "images": images
     }
 
@@ -0,0 +1,96 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from members.member5.extractor import extract_formulas, extract_citations
+from members.member5.pacing import duration_from_score, EASY_DURATION
+
+# A whitespace-separated token that contains at least one letter counts as a word
+WORD_TOKEN = re.compile(r"\S*[^\W\d_]\S*")
+# Closing characters allowed after a sentence-ending . ! ?
+SENTENCE_CLOSERS = "\"')]}”’»"
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+NON_LETTERS = re.compile(r"[^a-z]")
+
+
+@lru_cache(maxsize=100000)
+def count_syllables(word: str) -> int:
+    """Vowel-group heuristic (silent trailing 'e' dropped, every word has at least one)."""
+    word = NON_LETTERS.sub("", word.lower())
+    if not word:
+        return 0
+    count = len(VOWEL_GROUPS.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee", "ye")) and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+def flesch_reading_ease(words, sentences, syllables):
+    """Flesch formula on counts; works on plain numbers or NumPy arrays of counts."""
+    words = np.maximum(words, 1)
+    sentences = np.maximum(sentences, 1)
+    return 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / words)
+
+
+def _ends_sentence(token: str) -> bool:
+    return token.rstrip(SENTENCE_CLOSERS).endswith((".", "!", "?"))
+
+
+def analyze_batch(texts: list, include_matches: bool = True) -> list:
+    """
+    Analyze many documents (or pages) at once.
+    Every text is tokenized exactly once; word, sentence and syllable counts
+    all come from those shared tokens. Syllables and sentence ends are worked
+    out once per distinct token across the whole batch, and readability and
+    pacing are then evaluated for every document as NumPy array operations.
+    Returns one dict per text, in order, with the same keys as analyze_text().
+    """
+    n = len(texts)
+    token_counts = np.zeros(n, dtype=np.int64)
+    doc_ids, codes, occurrences = [], [], []
+    vocabulary = {}
+    for doc_id, text in enumerate(texts):
+        text = text or ""
+        token_counts[doc_id] = len(text.split())
+        counts = Counter(WORD_TOKEN.findall(text))
+        doc_ids.extend([doc_id] * len(counts))
+        codes.extend(vocabulary.setdefault(token, len(vocabulary)) for token in counts)
+        occurrences.extend(counts.values())
+
+    # Per distinct token: syllables and whether it ends a sentence
+    syllables = np.fromiter((count_syllables(t) for t in vocabulary), dtype=np.float64, count=len(vocabulary))
+    ends = np.fromiter((_ends_sentence(t) for t in vocabulary), dtype=np.float64, count=len(vocabulary))
+    doc_ids = np.asarray(doc_ids, dtype=np.int64)
+    codes = np.asarray(codes, dtype=np.int64)
+    occurrences = np.asarray(occurrences, dtype=np.float64)
+
+    word_counts = np.bincount(doc_ids, weights=occurrences, minlength=n)
+    sentence_counts = np.bincount(doc_ids, weights=occurrences * ends[codes], minlength=n)
+    syllable_counts = np.bincount(doc_ids, weights=occurrences * syllables[codes], minlength=n)
+
+    # Text that never ends a sentence (headings, a trailing fragment) is still one sentence
+    sentence_counts = np.maximum(sentence_counts, (word_counts > 0).astype(np.float64))
+    scores = np.where(word_counts > 0, flesch_reading_ease(word_counts, sentence_counts, syllable_counts), 0.0)
+    durations = np.where(word_counts > 0, duration_from_score(scores), EASY_DURATION)
+
+    results = []
+    for i, text in enumerate(texts):
+        result = {
+            "reading_ease_score": round(float(scores[i]), 2),
+            "recommended_duration_seconds": int(durations[i]),
+            "word_count": int(token_counts[i]),
+            "sentence_count": int(sentence_counts[i]),
+            "syllable_count": int(syllable_counts[i]),
+        }
+        if include_matches:
+            result["formulas_found"] = extract_formulas(text or "")
+            result["citations_found"] = extract_citations(text or "")
+        results.append(result)
+    return results
+
+
+def analyze_document(text: str, include_matches: bool = True) -> dict:
+    """Single-document analysis (readability, pacing, counts, formulas, citations). No AI calls."""
+    return analyze_batch([text], include_matches)[0]
@@ -1,27 +1,36 @@
-import re
-import textstat
-from collections import Counter
+import asyncio
 
 # --- ABSOLUTE IMPORTS (from backend root) ---
-from members.member5.pacing import calculate_duration
-from members.member5.extractor import extract_formulas, extract_citations
-from members.member5.glossary import build_glossary
+from members.member5.analytics import analyze_document
+from members.member5.glossary import generate_glossary
+
+# Texts shorter than this are analyzed inline; longer ones in a worker thread
+INLINE_ANALYSIS_CHARS = 20000
 
 # ==========================================
 # MAIN EXPORT FUNCTION
 # ==========================================
-def analyze_text(text: str) -> dict:
+async def analyze_text(text: str, include_glossary: bool = True) -> dict:
     """
     The main function called by routes.py
+    Readability, pacing, word count, formulas and citations come from one
+    shared pass (members/member5/analytics.py). The Gemini glossary is an
+    optional extra stage that runs alongside it.
     """
     if not text:
         return {"error": "No text provided"}
 
-    return {
-        "reading_ease_score": textstat.flesch_reading_ease(text) if text.strip() else 0,
-        "recommended_duration_seconds": calculate_duration(text),
-        "formulas_found": extract_formulas(text),
-        "citations_found": extract_citations(text),
-        "glossary_candidates": build_glossary(text),
-        "word_count": len(text.split())
-    }
\ No newline at end of file
+    if len(text) < INLINE_ANALYSIS_CHARS:
+        analysis = analyze_document(text)
+        glossary = await generate_glossary(text) if include_glossary else None
+    else:
+        stages = [asyncio.to_thread(analyze_document, text)]
+        if include_glossary:
+            stages.append(generate_glossary(text))
+        analysis, *rest = await asyncio.gather(*stages)
+        glossary = rest[0] if rest else None
+
+    if include_glossary:
+        analysis["glossary_candidates"] = glossary
+    return analysis
+
@@ -1,16 +1,81 @@
 import re
 
+# Compiled once at import instead of on every call
+FORMULA_PATTERN = re.compile(r"[a-zA-Z]\s*=\s*[^,\n]+")
+CITATION_PATTERN = re.compile(r"\[[0-9]+\]|\([A-Za-z]+,\s*\d{4}\)")
+
+# Distinct matches kept per kind; caps memory on very long documents
+MAX_MATCHES = 500
+
+
 def extract_formulas(text):
     """
     Find simple math formulas inside text.
+    Duplicates are dropped; the rest stay in order of appearance.
     """
-    pattern = r"[a-zA-Z]\s*=\s*[^,\n]+"
-    return list(set(re.findall(pattern, text)))
+    return list(dict.fromkeys(FORMULA_PATTERN.findall(text)))
 
 
 def extract_citations(text):
     """
     Find citations like [1] or (Smith, 2020).
+    Duplicates are dropped; the rest stay in order of appearance.
+    """
+    return list(dict.fromkeys(CITATION_PATTERN.findall(text)))
+
+
+class StreamingExtractor:
+    """
+    Incremental formula/citation finder fed one page at a time, so it can run
+    while the PDF is still being parsed (feed, or scan now and add later once
+    the offsets are known). Pages are not kept: only the first
+    occurrence of each distinct match is stored (up to max_matches per kind),
+    as {"text", "page", "offset"} with a 1-based page number and the character
+    offset inside that page's text.
     """
-    pattern = r"\[[0-9]+\]|\([A-Za-z]+,\s*\d{4}\)"
-    return list(set(re.findall(pattern, text)))
+
+    PATTERNS = {"formulas": FORMULA_PATTERN, "citations": CITATION_PATTERN}
+
+    def __init__(self, max_matches: int = MAX_MATCHES):
+        self.max_matches = max_matches
+        self.pages_seen = 0
+        self._matches = {kind: {} for kind in self.PATTERNS}
+        self.truncated = {kind: False for kind in self.PATTERNS}
+
+    def feed(self, page_text: str, page: int = None) -> dict:
+        """Scan one page; returns the matches first seen on it, per kind."""
+        self.pages_seen += 1
+        page = page or self.pages_seen
+        new = {kind: [] for kind in self.PATTERNS}
+        for kind, text, offset in self.scan(page_text):
+            if self.add(kind, text, page, offset):
+                new[kind].append(self._matches[kind][text])
+        return new
+
+    def scan(self, page_text: str) -> list:
+        """Every match on one page as (kind, text, offset), in order; nothing is recorded (see add)."""
+        if not page_text:
+            return []
+        return [
+            (kind, match.group(), match.start())
+            for kind, pattern in self.PATTERNS.items()
+            for match in pattern.finditer(page_text)
+        ]
+
+    def add(self, kind: str, text: str, page: int, offset: int) -> bool:
+        """Record one match; False for a repeat, or once max_matches of the kind are stored."""
+        found = self._matches[kind]
+        if text in found:
+            return False
+        if len(found) >= self.max_matches:
+            self.truncated[kind] = True
+            return False
+        found[text] = {"text": text, "page": page, "offset": offset}
+        return True
+
+    def matches(self, kind: str) -> list:
+        """Distinct matches of one kind in order of first appearance."""
+        return list(self._matches[kind].values())
+
+    def texts(self, kind: str) -> list:
+        return list(self._matches[kind])
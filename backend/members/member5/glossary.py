@@ -1,14 +1,25 @@
-import json
 import sys
 import os
 
 # Ensure we can import the core module to use Gemini
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from core.gemini_client import call_gemini
+from core.gemini_client import call_gemini_async
+from core.json_parser import parse_llm_json
+from members.member2.tutor_persona import GLOSSARY_SCHEMA
 
-def generate_glossary(text: str) -> list:
+# Shown in place of the glossary when Gemini fails; a response-layer fallback only, never cached
+GLOSSARY_UNAVAILABLE = [
+    {
+        "term": "AI Overloaded",
+        "definition": "The system could not generate definitions due to high traffic. Please try again."
+    }
+]
+
+async def build_glossary(text: str) -> list:
     """
     Extracts key terms from the text and uses Gemini to generate actual definitions.
+    Raises when Gemini fails or its output cannot be parsed, so the upload
+    pipeline records a stage error instead of caching a placeholder.
     """
     if not text or len(text.strip()) == 0:
         return []
@@ -26,30 +37,19 @@ def generate_glossary(text: str) -> list:
     {text[:4000]} 
     """
     
+    # Send to your rate-limit-proof Gemini client
+    response = await call_gemini_async(prompt, response_schema=GLOSSARY_SCHEMA)
+    if response.startswith("AI Error"):
+        raise RuntimeError(response)
+
+    # Recover the JSON list even if the model wrapped it in fences or prose
+    return parse_llm_json(response, expect=list, name="glossary")
+
+async def generate_glossary(text: str) -> list:
+    """Same as build_glossary, but never raises: failures become GLOSSARY_UNAVAILABLE"""
     try:
-        # Send to your rate-limit-proof Gemini client
-        response = call_gemini(prompt)
-        
-        # Clean up the response to ensure it is parseable JSON
-        clean_json = response.replace("```json", "").replace("```", "").strip()
-        glossary_data = json.loads(clean_json)
-        
-        # Validate the output is a list
-        if isinstance(glossary_data, list):
-            return glossary_data
-        else:
-            return []
-            
+        return await build_glossary(text)
     except Exception as e:
         print(f"Glossary Generation Error: {e}")
         # Safe fallback so the frontend never crashes
-        return [
-            {
-                "term": "AI Overloaded", 
-                "definition": "The system could not generate definitions due to high traffic. Please try again."
-            }
-        ]
-
-# Alias to match what your analyzer.py/main.py expects
-def build_glossary(text: str) -> list:
-    return generate_glossary(text)
\ No newline at end of file
+        return [dict(item) for item in GLOSSARY_UNAVAILABLE]
\ No newline at end of file
@@ -1,25 +1,43 @@
-import textstat
+# Flesch reading-ease thresholds and the video length (seconds) for each band
+EASY_SCORE = 60
+MEDIUM_SCORE = 30
+EASY_DURATION = 60
+MEDIUM_DURATION = 120
+HARD_DURATION = 180
 
-def calculate_duration(text):
+
+def duration_from_score(score):
     """
-    Decide video length based on how hard the text is.
-    Returns time in seconds.
+    Video length for a reading-ease score (no text processing needed).
+    Accepts a number or a NumPy array of scores.
     """
-
-    # If text is empty, give minimum time
-    if not text.strip():
-        return 60
-
-    score = textstat.flesch_reading_ease(text)
+    if hasattr(score, "shape"):
+        import numpy as np
+        return np.where(score > EASY_SCORE, EASY_DURATION,
+                        np.where(score >= MEDIUM_SCORE, MEDIUM_DURATION, HARD_DURATION))
 
     # Easy text
-    if score > 60:
-        return 60
+    if score > EASY_SCORE:
+        return EASY_DURATION
 
     # Medium text
-    elif score >= 30:
-        return 120
+    elif score >= MEDIUM_SCORE:
+        return MEDIUM_DURATION
 
     # Hard text
     else:
-        return 180
+        return HARD_DURATION
+
+
+def calculate_duration(text):
+    """
+    Decide video length based on how hard the text is.
+    Returns time in seconds.
+    """
+
+    # If text is empty, give minimum time
+    if not text.strip():
+        return EASY_DURATION
+
+    import textstat  # heavy (pulls in nltk/scipy): only load it when actually used
+    return duration_from_score(textstat.flesch_reading_ease(text))
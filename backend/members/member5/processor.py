@@ -1,5 +1,7 @@
-import pdfplumber
+import re
 import logging
+from bisect import bisect_right
+from collections import Counter
 
 def clean_pdf_text(file_path: str) -> str:
     """
@@ -8,6 +10,7 @@ def clean_pdf_text(file_path: str) -> str:
     clean_text = []
 
     try:
+        import pdfplumber  # only this legacy path needs it
         with pdfplumber.open(file_path) as pdf:
             for page in pdf.pages:
                 height = page.height
@@ -34,4 +37,121 @@ def clean_pdf_text(file_path: str) -> str:
         print(f"Error processing PDF {file_path}: {e}")
         return ""
 
-    return "\n".join(clean_text)
\ No newline at end of file
+    return "\n".join(clean_text)
+
+# ==========================================
+# FAST HEADER / FOOTER STRIPPING (no re-parsing)
+# ==========================================
+EDGE_LINES = 3            # lines at the top/bottom of a page that may be header/footer
+REPEAT_RATIO = 0.5        # a line on at least half the pages is boilerplate
+MIN_REPEAT_PAGES = 3
+
+PAGE_NUMBER_PATTERN = re.compile(r"^\W*(page\s*)?\d{1,4}(\s*(of|/)\s*\d{1,4})?\W*$", re.IGNORECASE)
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+def _normalize_line(line: str) -> str:
+    # "Lecture 5 - Page 12" and "Lecture 5 - Page 13" should count as the same line,
+    # but a bare number only matches itself (changing numbers are checked as page numbers)
+    if PAGE_NUMBER_PATTERN.match(line):
+        return line.strip().lower()
+    return DIGITS_PATTERN.sub("#", line.strip().lower())
+
+
+def kept_lines(pages: list) -> list:
+    """
+    Finds running headers, footers and page numbers in already-extracted page
+    texts and returns, per page, the indexes (into text.splitlines()) of the
+    lines to keep. Lines near the top/bottom of a page that repeat on many pages
+    (digits ignored) are peeled off each edge, up to EDGE_LINES deep. A bare
+    number ("12", "Page 12 of 40") is only treated as a page number when the
+    numbers at the page edges count up with the pages on as many pages as a
+    header must repeat on, so a lone "2024" or equation number at a page edge
+    stays. A page is never emptied: when every line looks like boilerplate
+    (a slide with just "Title slide N"), its content lines are kept.
+    One linear pass to count, one to pick the lines.
+    """
+    split_pages = [(text or "").splitlines() for text in pages]
+
+    counts = Counter()
+    # page number minus page index: a real page-number sequence keeps it constant
+    numbering = Counter()
+    for page_index, lines in enumerate(split_pages):
+        edges = _edge_indexes(lines)
+        counts.update({_normalize_line(lines[i]) for i in edges})
+        numbering.update({
+            _page_number(lines[i]) - page_index for i in edges if PAGE_NUMBER_PATTERN.match(lines[i])
+        })
+
+    min_pages = max(MIN_REPEAT_PAGES, int(len(pages) * REPEAT_RATIO))
+    repeated = {line for line, n in counts.items() if line and n >= min_pages}
+    offsets = {offset for offset, n in numbering.items() if n >= min_pages}
+
+    return [_kept_lines(lines, page_index, repeated, offsets) for page_index, lines in enumerate(split_pages)]
+
+
+def strip_headers_footers(pages: list) -> list:
+    """The page texts without their running headers, footers and page numbers (see kept_lines)."""
+    return [
+        "\n".join(lines[i] for i in kept)
+        for lines, kept in zip(((text or "").splitlines() for text in pages), kept_lines(pages))
+    ]
+
+
+def cleaned_offset(lines: list, kept: list):
+    """
+    Maps matches found in "\\n".join(lines) (the page with its line endings
+    normalized) into the cleaned page ("\\n".join of the kept lines): returns
+    locate(offset, length) -> the offset in the cleaned page, or None when the
+    match touches a removed line.
+    """
+    starts, position = [], 0
+    for line in lines:
+        starts.append(position)
+        position += len(line) + 1
+    cleaned_starts, position = {}, 0
+    for i in kept:
+        cleaned_starts[i] = position
+        position += len(lines[i]) + 1
+
+    def locate(offset: int, length: int):
+        first = bisect_right(starts, offset) - 1
+        last = bisect_right(starts, offset + max(length, 1) - 1) - 1
+        if any(i not in cleaned_starts for i in range(first, last + 1)):
+            return None
+        return cleaned_starts[first] + offset - starts[first]
+    return locate
+
+
+def _kept_lines(lines: list, page_index: int, repeated: set, offsets: set) -> list:
+    def page_number(i):
+        return bool(PAGE_NUMBER_PATTERN.match(lines[i])) and _page_number(lines[i]) - page_index in offsets
+
+    non_blank = [i for i, line in enumerate(lines) if line.strip()]
+    drop = set()
+    # Peel boilerplate off the top and the bottom, stopping at the first content line
+    for edge in (non_blank[:EDGE_LINES], non_blank[::-1][:EDGE_LINES]):
+        for i in edge:
+            if not (page_number(i) or _normalize_line(lines[i]) in repeated):
+                break
+            drop.add(i)
+
+    if len(drop) == len(non_blank):
+        # Only "boilerplate" on this page, so the repeated lines are its content
+        drop = {i for i in drop if page_number(i)}
+        if len(drop) == len(non_blank):
+            drop = set()
+    return [i for i in range(len(lines)) if i not in drop]
+
+
+def _page_number(line: str) -> int:
+    """The page number in a PAGE_NUMBER_PATTERN line (the first number: "12 of 40" -> 12)."""
+    return int(DIGITS_PATTERN.search(line).group())
+
+
+def _edge_indexes(lines: list) -> list:
+    """Indexes of the first and last EDGE_LINES non-blank lines of a page."""
+    non_blank = [i for i, line in enumerate(lines) if line.strip()]
+    if len(non_blank) <= EDGE_LINES * 2:
+        return non_blank
+    return non_blank[:EDGE_LINES] + non_blank[-EDGE_LINES:]
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Run from anywhere: the backend modules import each other from the backend root
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# The stores read their paths from the environment at import time, so point
+# them at a scratch directory before any test imports them
+_WORKDIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["LLM_CACHE_PATH"] = os.path.join(_WORKDIR, "llm_cache.sqlite3")
+os.environ["UPLOAD_CACHE_DIR"] = os.path.join(_WORKDIR, "uploads")
+os.environ["PDF_STORAGE_DIR"] = os.path.join(_WORKDIR, "storage")
+os.environ["DOCUMENT_STORE_PATH"] = os.path.join(_WORKDIR, "documents.sqlite3")
+os.environ["JOB_STORE_PATH"] = os.path.join(_WORKDIR, "jobs.sqlite3")
@@ -0,0 +1,103 @@
+import multiprocessing
+
+from core.document_store import SQLiteDocumentStore
+
+PAGES = ["Variance measures spread.\n", "Regression fits a line.\n", "Hypothesis tests reject or not.\n"]
+TEXT = "".join(PAGES)
+OFFSETS = [0, len(PAGES[0]), len(PAGES[0]) + len(PAGES[1])]
+
+# Workers run in fresh interpreters (spawn), like uvicorn --workers does
+_context = multiprocessing.get_context("spawn")
+
+
+def _run(target, *args):
+    process = _context.Process(target=target, args=args)
+    process.start()
+    process.join(60)
+    assert process.exitcode == 0
+
+
+def _read_in_worker(path, session_id, queue):
+    store = SQLiteDocumentStore(path)
+    entry = store.get(session_id)
+    queue.put({
+        "text": entry["text"],
+        "filename": entry["filename"],
+        "history": entry["history"],
+        "page": store.get_page(session_id, 2),
+        "search": [hit["page"] for hit in store.search(session_id, "regression")],
+        "index": entry.get("index"),
+    })
+
+
+def _create_in_worker(path, queue):
+    store = SQLiteDocumentStore(path)
+    queue.put(store.create(TEXT, "notes.pdf", pageOffsets=OFFSETS, history=[]))
+
+
+def _append_in_worker(path, session_id, worker, turns):
+    store = SQLiteDocumentStore(path)
+    for turn in range(turns):
+        store.modify(session_id, "history", lambda history: history + [f"{worker}:{turn}"], default=[])
+
+
+def test_session_created_in_one_process_is_read_in_another(tmp_path):
+    path = str(tmp_path / "documents.sqlite3")
+    store = SQLiteDocumentStore(path)
+    session_id = store.create(TEXT, "notes.pdf", pageOffsets=OFFSETS, history=["hi"], index=object())
+
+    queue = _context.Queue()
+    _run(_read_in_worker, path, session_id, queue)
+    seen = queue.get(timeout=10)
+
+    assert seen["text"] == TEXT
+    assert seen["filename"] == "notes.pdf"
+    assert seen["history"] == ["hi"]
+    assert seen["page"] == PAGES[1]
+    assert seen["search"] == [2]
+    # Python objects stay in the process that made them
+    assert seen["index"] is None
+
+
+def test_session_created_in_a_worker_is_visible_here(tmp_path):
+    path = str(tmp_path / "documents.sqlite3")
+    store = SQLiteDocumentStore(path)
+    assert len(store) == 0
+
+    queue = _context.Queue()
+    _run(_create_in_worker, path, queue)
+    session_id = queue.get(timeout=10)
+
+    assert session_id in store
+    assert store.get_text(session_id) == TEXT
+
+
+def test_concurrent_modify_from_several_processes_keeps_every_change(tmp_path):
+    path = str(tmp_path / "documents.sqlite3")
+    store = SQLiteDocumentStore(path)
+    session_id = store.create(TEXT, "notes.pdf", history=[])
+
+    workers = [_context.Process(target=_append_in_worker, args=(path, session_id, w, 20)) for w in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    history = store.get(session_id)["history"]
+    assert len(history) == 60
+    assert sorted(history) == sorted(f"{w}:{t}" for w in range(3) for t in range(20))
+
+
+def test_same_text_is_stored_once_and_deleted_with_its_last_session(tmp_path):
+    path = str(tmp_path / "documents.sqlite3")
+    store = SQLiteDocumentStore(path)
+    first = store.create(TEXT, "a.pdf")
+    second = store.create(TEXT, "b.pdf")
+    assert store.stats()["documents"] == 1
+
+    store.delete(first)
+    assert store.get(first) is None
+    assert store.get_text(second) == TEXT
+    store.delete(second)
+    assert store.stats()["documents"] == 0
@@ -0,0 +1,66 @@
+from members.member5.processor import kept_lines, strip_headers_footers
+
+TOPICS = ["variance", "regression", "sampling", "hypothesis tests", "confidence intervals", "p-values"]
+
+
+def lecture_pages(count: int = 6) -> list:
+    return [
+        f"Lecture 5 - Page {n}\n"
+        f"Intro to Statistics\n"
+        f"Today: {TOPICS[n % len(TOPICS)]} in section {n}.\n"
+        f"We derive the formula step {n * 7} and apply it to data set {chr(64 + n)}.\n"
+        f"{n}"
+        for n in range(1, count + 1)
+    ]
+
+
+def test_strips_running_header_footer_and_page_numbers():
+    cleaned = strip_headers_footers(lecture_pages())
+    for n, page in enumerate(cleaned, start=1):
+        assert "Lecture 5 - Page" not in page
+        assert "Intro to Statistics" not in page
+        assert page.splitlines() == [
+            f"Today: {TOPICS[n % len(TOPICS)]} in section {n}.",
+            f"We derive the formula step {n * 7} and apply it to data set {chr(64 + n)}.",
+        ]
+
+
+def test_keeps_a_number_that_does_not_count_up_with_the_pages():
+    pages = [f"Chapter notes\nresult {n} holds for every case {n * 3}\n2024" for n in range(1, 7)]
+    for page in strip_headers_footers(pages):
+        assert page.endswith("2024")
+
+
+def test_short_documents_are_left_alone():
+    pages = ["Header\nbody one\n1", "Header\nbody two\n2"]
+    assert strip_headers_footers(pages) == pages
+
+
+def test_slide_with_only_a_repeated_line_is_not_emptied():
+    # Title slides: the only line repeats (digits ignored) on every page
+    pages = [f"Title slide {n}" for n in range(1, 7)]
+    assert strip_headers_footers(pages) == pages
+
+
+def test_slide_keeps_its_title_but_loses_the_page_number():
+    pages = [f"Title slide {n}\n{n}" for n in range(1, 7)]
+    assert strip_headers_footers(pages) == [f"Title slide {n}" for n in range(1, 7)]
+
+
+def test_identical_pages_are_kept():
+    pages = ["Same handout text\nsecond line"] * 6
+    assert strip_headers_footers(pages) == pages
+
+
+def test_blank_and_missing_pages():
+    pages = lecture_pages(4) + ["", None, "   \n  "]
+    cleaned = strip_headers_footers(pages)
+    assert cleaned[4:] == ["", "", "   \n  "]
+    assert all("Lecture 5" not in page for page in cleaned[:4])
+
+
+def test_kept_lines_indexes_match_the_cleaned_text():
+    pages = lecture_pages()
+    for text, kept, cleaned in zip(pages, kept_lines(pages), strip_headers_footers(pages)):
+        lines = text.splitlines()
+        assert "\n".join(lines[i] for i in kept) == cleaned
@@ -0,0 +1,11 @@
+from bench.import_budget import DEFAULT_BUDGET_MS, check
+
+
+def test_services_import_within_budget():
+    reports = check(DEFAULT_BUDGET_MS)
+    assert reports
+    for report in reports:
+        assert not report["heavyImports"], f"{report['service']} imports {report['heavyImports']} eagerly"
+        assert report["milliseconds"] <= report["budgetMs"], (
+            f"{report['service']} takes {report['milliseconds']} ms to import (budget {report['budgetMs']} ms)"
+        )
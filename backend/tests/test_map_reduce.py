@@ -0,0 +1,99 @@
+import asyncio
+
+import core.map_reduce as map_reduce
+from core.map_reduce import (
+    MAP_REDUCE_MIN_CHARS,
+    SECTION_CHARS,
+    map_sections,
+    reduce_items,
+    sampling,
+    section_limit,
+    split_sections,
+    use_map_reduce,
+)
+
+
+def document(chars: int) -> str:
+    """Whole lines, at least `chars` long."""
+    line = "The sample variance measures the spread of the data around its mean.\n"
+    return line * -(-chars // len(line))
+
+
+def test_auto_threshold():
+    assert not use_map_reduce("auto", "x" * MAP_REDUCE_MIN_CHARS)
+    assert use_map_reduce("auto", "x" * (MAP_REDUCE_MIN_CHARS + 1))
+    assert use_map_reduce("map_reduce", "short")
+    assert not use_map_reduce("single", document(MAP_REDUCE_MIN_CHARS * 3))
+
+
+def test_short_text_is_one_section():
+    assert split_sections("  just one slide  ", max_sections=8) == ["just one slide"]
+    assert split_sections("   ", max_sections=8) == []
+
+
+def test_sections_follow_the_document_length_and_break_on_lines():
+    text = document(SECTION_CHARS * 3 + 100)
+    sections = split_sections(text, max_sections=8)
+    assert len(sections) == 4
+    for section in sections:
+        assert len(section) <= SECTION_CHARS
+        assert section.startswith("The sample variance")
+        assert section.endswith("mean.")
+    assert sampling(text, sections)["sampled"] is False
+
+
+def test_long_document_is_sampled_evenly_past_max_sections():
+    text = "".join(f"paragraph {i} " + "x" * 990 + "\n" for i in range(100))
+    sections = split_sections(text, section_chars=1000, max_sections=4)
+    assert len(sections) == 4
+    assert [int(s.split()[1]) for s in sections] == [0, 25, 50, 75]
+
+    report = sampling(text, sections)
+    assert report["sections"] == 4
+    assert report["sampled"] is True
+    assert report["coverage"] < 0.1
+
+
+def test_section_count_is_capped_by_the_free_request_budget(monkeypatch):
+    monkeypatch.setattr(map_reduce, "requests_available", lambda: 12)
+    assert section_limit() == 3
+    assert len(split_sections(document(SECTION_CHARS * 6))) == 3
+
+    monkeypatch.setattr(map_reduce, "requests_available", lambda: 0)
+    assert section_limit() == 1
+
+    monkeypatch.setattr(map_reduce, "requests_available", lambda: 1000)
+    assert section_limit() == map_reduce.MAX_SECTIONS
+
+
+def test_map_sections_runs_in_one_wave_and_survives_failures():
+    running, peak = 0, 0
+
+    async def func(index, section):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if index == 1:
+            raise RuntimeError("boom")
+        return [section.upper()]
+
+    results = asyncio.run(map_sections(["a", "b", "c", "d"], func))
+    assert results == [["A"], [], ["C"], ["D"]]
+    assert peak == 4
+
+
+def test_reduce_items_dedupes_and_round_robins():
+    per_section = [
+        ["what is the sample variance", "what is the mean of a sample"],
+        ["what is the sample variance?", "how is regression fitted"],
+        ["when is a hypothesis rejected"],
+    ]
+    picked = reduce_items(per_section, 4, key=lambda item: item)
+    assert picked == [
+        "what is the sample variance",
+        "how is regression fitted",
+        "when is a hypothesis rejected",
+        "what is the mean of a sample",
+    ]
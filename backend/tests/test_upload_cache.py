@@ -0,0 +1,44 @@
+import json
+import os
+
+from core.upload_cache import UploadCache, hash_bytes
+
+
+def test_hit_and_miss(tmp_path):
+    cache = UploadCache(str(tmp_path))
+    digest = hash_bytes(b"%PDF lecture 1")
+    assert cache.get(digest) is None
+
+    cache.put(digest, {"sessionText": "hello", "glossary": []})
+    assert cache.get(digest) == {"sessionText": "hello", "glossary": []}
+    assert cache.get(hash_bytes(b"%PDF lecture 2")) is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = UploadCache(str(tmp_path))
+    digest = hash_bytes(b"broken")
+    path = os.path.join(str(tmp_path), f"{digest}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+
+    assert cache.get(digest) is None
+    assert not os.path.exists(path)
+
+
+def test_evicts_least_recently_used_past_max_bytes(tmp_path):
+    entry = {"text": "x" * 100}
+    size = len(json.dumps(entry))
+    cache = UploadCache(str(tmp_path), max_bytes=size * 2)
+    for i, digest in enumerate(("a", "b")):
+        cache.put(digest, entry)
+        os.utime(os.path.join(str(tmp_path), f"{digest}.json"), (1000 + i, 1000 + i))
+
+    # A hit refreshes "a", so "b" is now the least recently used
+    assert cache.get("a") == entry
+    cache.put("c", entry)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == entry
+    assert cache.get("c") == entry
+    assert cache.stats()["bytes"] <= cache.max_bytes
@@ -39,13 +39,16 @@ export interface StudyData {
   flashcards?: FlashCard[];
   glossary?: { term: string; definition: string }[];
   formulas?: string[];
-  citations?: { title: string; link: string }[];
+  formulaSources?: { page: number; offset: number }[];
+  citations?: { title: string; link: string; page?: number; offset?: number }[];
+  matchesTruncated?: { formulas: boolean; citations: boolean };
 }
 
 export default function Home() {
   // Core state
   const [hasDocument, setHasDocument] = useState(false);
   const [documentName, setDocumentName] = useState("");
+  const [sessionId, setSessionId] = useState("");
   const [loading, setLoading] = useState(false);
   const [uploadProgress, setUploadProgress] = useState(0);
 
@@ -76,7 +79,7 @@ export default function Home() {
         setUploadProgress((prev) => Math.min(prev + 10, 90));
       }, 200);
 
-      const response = await fetch("http://127.0.0.1:8000/upload", {
+      const response = await fetch("http://127.0.0.1:8000/upload?studyPack=true", {
         method: "POST",
         body: formData,
       });
@@ -88,6 +91,7 @@ export default function Home() {
 
       const data = await response.json();
       
+      setSessionId(data.sessionId);
       setHasDocument(true);
       
       // Set initial summary message
@@ -105,7 +109,7 @@ export default function Home() {
       }
 
       // Request video generation
-      generateVideo();
+      generateVideo(data.sessionId);
 
     } catch (error) {
       console.error("Upload error:", error);
@@ -118,17 +122,39 @@ export default function Home() {
   };
 
   // Generate video summary
-  const generateVideo = async () => {
+  const generateVideo = async (docSessionId: string) => {
     setVideoLoading(true);
     try {
       const response = await fetch("http://127.0.0.1:8000/generate-video", {
         method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ sessionId: docSessionId }),
       });
 
       if (!response.ok) throw new Error("Video generation failed");
 
       const data = await response.json();
-      setVideoData(data);
+      if (!data.jobId) {
+        setVideoData(data);
+        return;
+      }
+
+      // Rendering runs as a background job on the backend: poll until it finishes
+      while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 3000));
+        const statusResponse = await fetch(`http://127.0.0.1:8000/video-status/${data.jobId}`);
+        if (!statusResponse.ok) throw new Error("Video status check failed");
+
+        const job = await statusResponse.json();
+        if (job.status === "done") {
+          setVideoData(job.result);
+          break;
+        }
+        if (job.status === "failed") {
+          setVideoData({ videoUrl: "", script: "Video generation failed.", duration: 60 });
+          break;
+        }
+      }
     } catch (error) {
       console.error("Video generation error:", error);
     } finally {
@@ -148,24 +174,54 @@ export default function Home() {
     setChatLoading(true);
 
     try {
-      const response = await fetch("http://127.0.0.1:8000/chat", {
+      const response = await fetch("http://127.0.0.1:8000/chat/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ question: content }),
+        body: JSON.stringify({ question: content, sessionId }),
       });
 
-      if (!response.ok) throw new Error("Chat request failed");
-
-      const data = await response.json();
-      
-      setMessages((prev) => [
-        ...prev,
-        {
-          role: "assistant",
-          content: data.answer || "I couldn't process that question.",
-          timestamp: new Date(),
-        },
-      ]);
+      if (!response.ok || !response.body) throw new Error("Chat request failed");
+
+      // Read Server-Sent Events and grow the assistant message as tokens arrive
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let answer = "";
+      let stage = "";
+      let started = false;
+
+      const showAnswer = (text: string) => {
+        setChatLoading(false);
+        setMessages((prev) => {
+          const assistantMessage: Message = { role: "assistant", content: text, timestamp: new Date() };
+          return started ? [...prev.slice(0, -1), assistantMessage] : [...prev, assistantMessage];
+        });
+        started = true;
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop() || "";
+        for (const event of events) {
+          if (!event.startsWith("data: ")) continue;
+          const data = JSON.parse(event.slice(6));
+          if (data.type === "token") {
+            // ELI5: the simplified answer replaces the streamed draft
+            if (data.stage !== stage) {
+              stage = data.stage;
+              answer = "";
+            }
+            answer += data.text;
+            showAnswer(answer);
+          } else if (data.type === "done") {
+            showAnswer(data.answer || "I couldn't process that question.");
+          }
+        }
+      }
     } catch (error) {
       console.error("Chat error:", error);
       setMessages((prev) => [
@@ -201,6 +257,8 @@ export default function Home() {
     try {
       const response = await fetch("http://127.0.0.1:8000/generate-quiz", {
         method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ sessionId }),
       });
 
       if (!response.ok) throw new Error("Quiz generation failed");
@@ -218,6 +276,8 @@ export default function Home() {
     try {
       const response = await fetch("http://127.0.0.1:8000/generate-flashcards", {
         method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ sessionId }),
       });
 
       if (!response.ok) throw new Error("Flashcard generation failed");
@@ -239,6 +299,7 @@ export default function Home() {
         onNewDocument={() => {
           setHasDocument(false);
           setDocumentName("");
+          setSessionId("");
           setMessages([]);
           setVideoData(null);
           setStudyData(null);
@@ -2,10 +2,11 @@
 import { ExternalLink, Search, Copy } from "lucide-react";
 
 interface CitationsPanelProps {
-  citations: { title: string; link: string }[];
+  citations: { title: string; link: string; page?: number; offset?: number }[];
+  truncated?: boolean;
 }
 
-export default function CitationsPanel({ citations }: CitationsPanelProps) {
+export default function CitationsPanel({ citations, truncated }: CitationsPanelProps) {
   const copyLink = (link: string) => {
     navigator.clipboard.writeText(link);
   };
@@ -30,8 +31,12 @@ export default function CitationsPanel({ citations }: CitationsPanelProps) {
     <div className="h-full flex flex-col">
       {/* Header */}
       <div className="border-b border-dark-border p-4 bg-dark-surface">
-        <h3 className="font-semibold">Citations ({citations.length})</h3>
-        <p className="text-xs text-gray-400 mt-1">Extracted references with verification links</p>
+        <h3 className="font-semibold">Citations ({citations.length}{truncated ? "+" : ""})</h3>
+        <p className="text-xs text-gray-400 mt-1">
+          {truncated
+            ? `Showing the first ${citations.length} references found in the document`
+            : "Extracted references with verification links"}
+        </p>
       </div>
 
       {/* Citations List */}
@@ -49,6 +54,9 @@ export default function CitationsPanel({ citations }: CitationsPanelProps) {
                 </div>
                 <div className="flex-1 min-w-0">
                   <p className="text-sm text-gray-200 mb-2 leading-relaxed">{citation.title}</p>
+                  {citation.page && (
+                    <p className="text-xs text-gray-500 mb-2">Page {citation.page}</p>
+                  )}
                   <div className="flex items-center gap-2">
                     <a
                       href={citation.link}
@@ -3,9 +3,10 @@ import { Calculator, Copy } from "lucide-react";
 
 interface FormulasPanelProps {
   formulas: string[];
+  truncated?: boolean;
 }
 
-export default function FormulasPanel({ formulas }: FormulasPanelProps) {
+export default function FormulasPanel({ formulas, truncated }: FormulasPanelProps) {
   const copyFormula = (formula: string) => {
     navigator.clipboard.writeText(formula);
   };
@@ -30,8 +31,12 @@ export default function FormulasPanel({ formulas }: FormulasPanelProps) {
     <div className="h-full flex flex-col">
       {/* Header */}
       <div className="border-b border-dark-border p-4 bg-dark-surface">
-        <h3 className="font-semibold">Key Formulas ({formulas.length})</h3>
-        <p className="text-xs text-gray-400 mt-1">Auto-extracted mathematical equations</p>
+        <h3 className="font-semibold">Key Formulas ({formulas.length}{truncated ? "+" : ""})</h3>
+        <p className="text-xs text-gray-400 mt-1">
+          {truncated
+            ? `Showing the first ${formulas.length} equations found in the document`
+            : "Auto-extracted mathematical equations"}
+        </p>
       </div>
 
       {/* Formulas List */}
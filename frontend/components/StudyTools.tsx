@@ -111,10 +111,16 @@ export default function StudyTools({
           <GlossaryPanel glossary={studyData?.glossary || []} />
         )}
         {activeTab === "formulas" && (
-          <FormulasPanel formulas={studyData?.formulas || []} />
+          <FormulasPanel
+            formulas={studyData?.formulas || []}
+            truncated={studyData?.matchesTruncated?.formulas}
+          />
         )}
         {activeTab === "citations" && (
-          <CitationsPanel citations={studyData?.citations || []} />
+          <CitationsPanel
+            citations={studyData?.citations || []}
+            truncated={studyData?.matchesTruncated?.citations}
+          />
         )}
       </div>
     </div>